@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from langchain_core.messages import HumanMessage
+
+from critic import critic_stats
+from metrics import format_latency, snapshot, summary_lines, usage_lines
+from response_cache import ainvoke_cached, create_response_cache, run_result
+
+
+def read_prompts(source) -> list:
+    """Read one prompt per line, skipping blanks and '#' comments"""
+    prompts = []
+    for line in source:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            prompts.append(line.strip('"'))
+    return prompts
+
+
+async def run_prompt(graph, index: int, prompt: str, run_id: str, limiter: asyncio.Semaphore, cache=None) -> dict:
+    """Run one prompt through the graph on its own thread_id, answering from `cache` when it can"""
+    thread_id = f"batch-{run_id}-{index}"
+    config = {"configurable": {"thread_id": thread_id}}
+    record = {"index": index, "thread_id": thread_id, "prompt": prompt}
+
+    async with limiter:
+        start_time = time.perf_counter()
+        try:
+            if cache is not None:
+                record.update(await ainvoke_cached(graph, cache, prompt, config))
+            else:
+                state = await graph.ainvoke({"messages": [HumanMessage(content=prompt)]}, config)
+                record.update(run_result(state))
+        except Exception as e:
+            record["error"] = str(e)
+        record["latency_s"] = round(time.perf_counter() - start_time, 4)
+    return record
+
+
+async def run_batch(graph, prompts: list, out, concurrency: int = 8, cache=None) -> list:
+    """Run all prompts with at most `concurrency` in flight, writing JSONL as they finish"""
+    run_id = uuid.uuid4().hex[:8]
+    limiter = asyncio.Semaphore(max(1, concurrency))
+    tasks = [asyncio.create_task(run_prompt(graph, i, p, run_id, limiter, cache)) for i, p in enumerate(prompts)]
+
+    records = []
+    for finished in asyncio.as_completed(tasks):
+        record = await finished
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        records.append(record)
+    return records
+
+
+def print_report(records: list, wall_time: float, cache=None, resilience=None):
+    """Throughput and latency percentiles for a finished batch"""
+    latencies = [r["latency_s"] for r in records]
+    errors = sum(1 for r in records if "error" in r)
+    throughput = len(records) / wall_time if wall_time > 0 else 0.0
+
+    print(f"\n📈 Batch Summary - {len(records)} prompts in {wall_time:.2f}s ({errors} errors)", file=sys.stderr)
+    print(f"  • Throughput: {throughput:.2f} prompts/s", file=sys.stderr)
+    print(f"  • Latency: {format_latency(latencies)}", file=sys.stderr)
+    critic = critic_stats()
+    if critic["llm_calls_avoided"] or critic["llm_fallback"]:
+        print(f"  • Critic: {critic['llm_calls_avoided']} critique LLM calls avoided, "
+              f"{critic['llm_fallback']} sent to the LLM", file=sys.stderr)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"  • Response cache: {stats['exact_hits']} exact + {stats['similar_hits']} similar hits / "
+              f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+              f"{stats['saved_llm_calls']} LLM calls saved", file=sys.stderr)
+    if resilience is not None:
+        stats = resilience.stats()
+        if stats["hedged"] or stats["timeouts"] or stats["errors"] or stats["short_circuited"] or stats["not_started"]:
+            print(f"  • Provider: {stats['hedged']} hedged ({stats['hedge_wins']} won), {stats['timeouts']} timeouts, "
+                  f"{stats['errors']} errors, {stats['short_circuited']} skipped by open circuit, "
+                  f"{stats['not_started']} never got a call thread", file=sys.stderr)
+    batching = snapshot()
+    if "llm_batch:size" in batching:
+        size, delay = batching["llm_batch:size"], batching["llm_batch:queue_delay"]
+        print(f"  • LLM batching: {size['count']} batches, size p50 {size['p50']:.0f} / p95 {size['p95']:.0f}, "
+              f"queue delay p50 {delay['p50'] * 1000:.1f}ms / p95 {delay['p95'] * 1000:.1f}ms", file=sys.stderr)
+    for line in summary_lines():
+        print(f"  • {line}", file=sys.stderr)
+    for line in usage_lines():
+        print(f"  • LLM {line}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued prompts through the assistant graph")
+    parser.add_argument("input", nargs="?", default="-", help="prompt file, one per line ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file ('-' for stdout)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="max prompts in flight")
+    parser.add_argument("--no-cache", action="store_true", help="always run the graph, even for repeated prompts")
+    args = parser.parse_args()
+
+    from graph_builder import get_graph
+    graph = get_graph()
+    cache = None if args.no_cache else create_response_cache()
+
+    if args.input == "-":
+        prompts = read_prompts(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            prompts = read_prompts(f)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    print(f"🚀 Batch of {len(prompts)} prompts at {datetime.now().strftime('%H:%M:%S')} "
+          f"(concurrency {args.concurrency})", file=sys.stderr)
+
+    start_time = time.perf_counter()
+    try:
+        records = asyncio.run(run_batch(graph, prompts, out, args.concurrency, cache))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print_report(records, time.perf_counter() - start_time, cache, getattr(graph, "resilience", None))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Bytes written and latency of the checkpoint storage formats.
+
+Runs the real graph around the fake chat model for a number of multi-turn
+conversations, once per format, with pruning disabled so every checkpoint
+stays on disk:
+
+    full        one msgpack blob per checkpoint (the SqliteSaver format)
+    zlib        full checkpoints, zlib-compressed
+    delta       message deltas with a full snapshot every --snapshot-every steps
+    delta+zlib  both
+
+Reads are timed on a freshly opened store (nothing cached): the latest
+checkpoint of every thread, then each thread's full history.
+
+    python benchmarks/checkpoint_serde.py
+    python benchmarks/checkpoint_serde.py --threads 20 --turns 30
+
+Exits with status 1 when a format restores different messages than "full".
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain_core.messages import HumanMessage
+
+from checkpoint_store import CheckpointStore
+from fake_llm import FakeChatModel
+from graph_builder import create_graph
+from metrics import percentile
+
+CORPUS = os.path.join(ROOT, "benchmarks", "prompts.txt")
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def formats(snapshot_every: int) -> dict:
+    return {
+        "full": {},
+        "zlib": {"compress_level": 1},
+        "delta": {"snapshot_every": snapshot_every},
+        "delta+zlib": {"snapshot_every": snapshot_every, "compress_level": 1},
+    }
+
+
+def transcript(checkpoint_tuple) -> list:
+    return [(m.type, m.content) for m in checkpoint_tuple.checkpoint["channel_values"].get("messages", [])]
+
+
+def run_format(settings: dict, corpus: list, threads: int, turns: int, path: str) -> dict:
+    store = CheckpointStore(path, keep_last=0, compact_interval=0, **settings)
+    graph = create_graph(llm=FakeChatModel(latency_s=0), checkpointer=store)
+    configs = [{"configurable": {"thread_id": f"bench-{t}"}} for t in range(threads)]
+    for turn in range(turns):
+        for t, config in enumerate(configs):
+            graph.invoke({"messages": [HumanMessage(content=corpus[(t * turns + turn) % len(corpus)])]}, config)
+    write_stats = store.metrics()
+    checkpoints, checkpoint_bytes = store.conn.execute("SELECT count(*), sum(length(checkpoint)) FROM checkpoints").fetchone()
+    (write_bytes,) = store.conn.execute("SELECT coalesce(sum(length(value)), 0) FROM writes").fetchone()
+    store.close()
+
+    store = CheckpointStore(path, compact_interval=0, **settings)
+    latest, transcripts = [], []
+    for config in configs:
+        start_time = time.perf_counter()
+        checkpoint_tuple = store.get_tuple(config)
+        latest.append(time.perf_counter() - start_time)
+        transcripts.append(transcript(checkpoint_tuple))
+    start_time = time.perf_counter()
+    for config in configs:
+        for _ in store.list(config):
+            pass
+    history_s = time.perf_counter() - start_time
+    store.close()
+
+    return {
+        "checkpoints": checkpoints,
+        "checkpoint_bytes": checkpoint_bytes,
+        "write_bytes": write_bytes,
+        "put_p50_ms": write_stats["write_ms_p50"],
+        "put_p95_ms": write_stats["write_ms_p95"],
+        "latest_p50_ms": percentile(latest, 50) * 1000,
+        "latest_p95_ms": percentile(latest, 95) * 1000,
+        "history_ms": history_s * 1000 / threads,
+        "transcripts": transcripts,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8, help="conversations")
+    parser.add_argument("--turns", type=int, default=15, help="prompts per conversation")
+    parser.add_argument("--snapshot-every", type=int, default=10)
+    parser.add_argument("--corpus", default=CORPUS)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, settings in formats(args.snapshot_every).items():
+            path = os.path.join(workdir, f"{name.replace('+', '-')}.db")
+            results[name] = run_format(settings, corpus, args.threads, args.turns, path)
+
+    full = results["full"]
+    print(f"{args.threads} conversations x {args.turns} turns, {full['checkpoints']} checkpoints per format\n")
+    print(f"{'format':<12}{'ckpt KiB':>10}{'vs full':>9}{'writes KiB':>12}{'put p50':>9}{'put p95':>9}"
+          f"{'latest p50':>12}{'latest p95':>12}{'history':>10}")
+    mismatched = []
+    for name, r in results.items():
+        print(f"{name:<12}{r['checkpoint_bytes'] / 1024:>10.0f}{r['checkpoint_bytes'] / full['checkpoint_bytes']:>8.0%} "
+              f"{r['write_bytes'] / 1024:>11.0f}{r['put_p50_ms']:>9.3f}{r['put_p95_ms']:>9.3f}"
+              f"{r['latest_p50_ms']:>12.3f}{r['latest_p95_ms']:>12.3f}{r['history_ms']:>10.2f}")
+        if r["transcripts"] != full["transcripts"]:
+            mismatched.append(name)
+    print("\nTimes in ms; history is the time to walk one thread's checkpoints on a cold store.")
+
+    for name in mismatched:
+        print(f"❌ {name} restored different messages than the full format")
+    if mismatched:
+        sys.exit(1)
+    print("✅ Every format restores the same conversations")
+
+
+if __name__ == "__main__":
+    main()
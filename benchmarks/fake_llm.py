@@ -0,0 +1,90 @@
+"""Deterministic stand-in chat model for running the real graph offline."""
+import json
+import random
+import time
+import uuid
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from context import message_text
+from router import route
+
+FILLER = (
+    "the assistant checked current data and found clear details that answer your question with "
+    "practical context useful next steps numbers sources and a short explanation of what changed"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers from a seeded RNG after a fixed delay.
+
+    Drafts request a tool call (routed with router.route) with probability
+    `tool_call_rate`, critique prompts get APPROVE/REVISE, keyword prompts get a
+    comma-separated list, and everything else gets `words` filler words. The same
+    prompt and seed always produce the same answer. When streamed, the first
+    token arrives after `latency_s` and each following word after `token_latency_s`.
+    """
+
+    latency_s: float = 0.02
+    token_latency_s: float = 0.0
+    words: tuple = (30, 160)
+    tool_call_rate: float = 0.8
+    revise_rate: float = 0.3
+    seed: int = 0
+    tool_names: tuple = ()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tool_names": tuple(t.name for t in tools)})
+
+    def _reply(self, messages) -> AIMessage:
+        last = message_text(messages[-1])
+        rng = random.Random(f"{self.seed}:{len(messages)}:{last}")
+
+        if self.tool_names and isinstance(messages[-1], HumanMessage) and rng.random() < self.tool_call_rate:
+            tool, args = route(last)
+            if tool in self.tool_names:
+                call = {"name": tool, "args": args, "id": f"call_{uuid.UUID(int=rng.getrandbits(128)).hex[:12]}"}
+                return AIMessage(content="", tool_calls=[call])
+
+        if "'REVISE'" in last:
+            content = "REVISE" if rng.random() < self.revise_rate else "APPROVE"
+        elif "keywords" in last.lower():
+            content = ", ".join(rng.sample(FILLER, 6))
+        elif "meta description" in last.lower():
+            content = " ".join(rng.choices(FILLER, k=20)).capitalize() + ". " + " ".join(rng.choices(FILLER, k=15)) + "."
+        else:
+            content = " ".join(rng.choices(FILLER, k=rng.randint(*self.words))).capitalize() + "."
+        return AIMessage(content=content)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency_s)
+        message = self._reply(messages)
+        input_tokens = sum(len(message_text(m)) // 4 + 1 for m in messages)
+        output_tokens = len(message.content) // 4 + 1
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency_s)
+        message = self._reply(messages)
+        if message.tool_calls:
+            chunk = AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(message.tool_calls)
+            ])
+            yield ChatGenerationChunk(message=chunk)
+            return
+        for i, word in enumerate(message.content.split(" ")):
+            if i and self.token_latency_s:
+                time.sleep(self.token_latency_s)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
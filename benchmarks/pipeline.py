@@ -0,0 +1,198 @@
+"""Offline benchmark of the full draft -> critique -> refine -> SEO/summary pipeline.
+
+Builds the real graph from graph_builder.create_graph() around a deterministic
+fake chat model (no API key needed), then replays benchmarks/prompts.txt
+across a grid of concurrency levels, conversation thread counts and checkpoint
+backends. For each scenario it reports end-to-end throughput and latency,
+per-node latency, checkpoint overhead (sqlite vs. no checkpointer) and peak RSS.
+
+    python benchmarks/pipeline.py                 # run and compare with the baseline
+    python benchmarks/pipeline.py --update        # run and record a new baseline
+    python benchmarks/pipeline.py --json out.json # also save the raw results
+
+Each scenario runs --repeat times and reports the median of each figure.
+Exits with status 1 when a scenario's throughput drops, or its p50 latency
+rises, by more than --tolerance relative to benchmarks/baselines/pipeline.json.
+p95/p99 are reported but not gated: the small scenarios only have a handful
+of prompts, so their p95 is effectively the slowest one and swings between
+runs by more than any sensible tolerance.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import resource
+import sys
+import tempfile
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from langchain_core.messages import HumanMessage
+
+import metrics
+from checkpoint_store import CheckpointStore
+from fake_llm import FakeChatModel
+from graph_builder import create_graph
+from metrics import percentile
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "pipeline.json")
+CORPUS = os.path.join(ROOT, "benchmarks", "prompts.txt")
+
+
+def load_corpus(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def make_checkpointer(backend: str, workdir: str):
+    if backend == "none":
+        return False
+    if backend == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+        return MemorySaver()
+    if backend == "sqlite":
+        return CheckpointStore(os.path.join(workdir, f"bench-{uuid.uuid4().hex[:8]}.db"), compact_interval=0)
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+async def replay(graph, corpus: list, threads: int, turns: int, concurrency: int) -> list:
+    """Each thread sends `turns` prompts in order; at most `concurrency` runs are in flight"""
+    limiter = asyncio.Semaphore(concurrency)
+    run_id = uuid.uuid4().hex[:8]
+    latencies = []
+
+    async def conversation(t: int):
+        config = {"configurable": {"thread_id": f"bench-{run_id}-{t}"}}
+        for turn in range(turns):
+            prompt = corpus[(t * turns + turn) % len(corpus)]
+            async with limiter:
+                start_time = time.perf_counter()
+                await graph.ainvoke({"messages": [HumanMessage(content=prompt)]}, config)
+                latencies.append(time.perf_counter() - start_time)
+
+    await asyncio.gather(*(conversation(t) for t in range(threads)))
+    return latencies
+
+
+def run_scenario(corpus, concurrency, threads, turns, backend, latency_s, workdir) -> dict:
+    metrics.reset()
+    checkpointer = make_checkpointer(backend, workdir)
+    graph = create_graph(llm=FakeChatModel(latency_s=latency_s), checkpointer=checkpointer)
+
+    start_time = time.perf_counter()
+    latencies = asyncio.run(replay(graph, corpus, threads, turns, concurrency))
+    wall = time.perf_counter() - start_time
+
+    result = {
+        "prompts": len(latencies),
+        "wall_s": round(wall, 4),
+        "throughput": round(len(latencies) / wall, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "nodes": {
+            key: {"count": s["count"], "p50_ms": round(s["p50"] * 1000, 3), "p95_ms": round(s["p95"] * 1000, 3)}
+            for key, s in metrics.snapshot().items()
+        },
+        # ru_maxrss is in KiB on Linux; it is a process-wide high-water mark
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if isinstance(checkpointer, CheckpointStore):
+        result["checkpoint"] = checkpointer.metrics()
+        checkpointer.close()
+    return result
+
+
+def median_run(runs: list) -> dict:
+    """The median of each latency/throughput figure across repeated runs of one scenario"""
+    result = dict(sorted(runs, key=lambda r: r["throughput"])[len(runs) // 2])
+    for key in ("wall_s", "throughput", "mean_ms", "p50_ms", "p95_ms", "p99_ms"):
+        result[key] = round(statistics.median(r[key] for r in runs), 3)
+    result["runs"] = len(runs)
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Names of scenarios that regressed against the baseline"""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            continue
+        if current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['throughput']:.2f}/s < baseline {base['throughput']:.2f}/s")
+        if current["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {current['p50_ms']:.1f}ms > baseline {base['p50_ms']:.1f}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8", help="comma-separated runs in flight")
+    parser.add_argument("--threads", default="4,16", help="comma-separated conversation thread counts")
+    parser.add_argument("--turns", type=int, default=2, help="prompts per thread")
+    parser.add_argument("--backends", default="none,sqlite", help="checkpoint backends: none, memory, sqlite")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake model latency per call (s)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per scenario; the median is reported")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--update", action="store_true", help="record these results as the new baseline")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    thread_counts = [int(t) for t in args.threads.split(",")]
+    backends = args.backends.split(",")
+
+    results = {
+        "settings": {"turns": args.turns, "latency_s": args.latency, "corpus_size": len(corpus), "repeat": args.repeat},
+        "scenarios": {},
+    }
+    print(f"{'scenario':<22}{'prompts':>8}{'prompts/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'ckpt ms':>9}{'rss MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for concurrency in concurrencies:
+            for threads in thread_counts:
+                for backend in backends:
+                    name = f"c{concurrency}-t{threads}-{backend}"
+                    r = median_run([run_scenario(corpus, concurrency, threads, args.turns, backend, args.latency, workdir)
+                                    for _ in range(max(1, args.repeat))])
+                    baseline_name = f"c{concurrency}-t{threads}-none"
+                    if backend != "none" and baseline_name in results["scenarios"]:
+                        r["checkpoint_overhead_ms"] = round(r["mean_ms"] - results["scenarios"][baseline_name]["mean_ms"], 3)
+                    results["scenarios"][name] = r
+                    overhead = r.get("checkpoint_overhead_ms")
+                    print(f"{name:<22}{r['prompts']:>8}{r['throughput']:>11.2f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+                          f"{overhead if overhead is not None else float('nan'):>9.2f}{r['peak_rss_mb']:>8.1f}")
+
+    print("\nPer-node latency (last scenario):")
+    for key, s in results["scenarios"][name]["nodes"].items():
+        print(f"  • {key}: n={s['count']} p50 {s['p50_ms']:.1f}ms | p95 {s['p95_ms']:.1f}ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\n📝 Baseline written to {os.path.relpath(BASELINE, ROOT)}")
+    elif os.path.exists(BASELINE):
+        with open(BASELINE, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
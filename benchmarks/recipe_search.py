@@ -0,0 +1,114 @@
+"""Recipe index query latency as the corpus grows.
+
+Generates synthetic corpora (ingredient popularity follows a Zipf curve, like
+real recipe data), builds an index file for each size, and times random 1-4
+ingredient queries with and without a cuisine filter.
+
+    python benchmarks/recipe_search.py
+    python benchmarks/recipe_search.py --sizes 1000,10000,100000 --queries 5000
+
+Each query set is timed --repeat times and the median of each percentile is
+reported. Exits with status 1 when a size's p95 query latency exceeds --budget-ms.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from metrics import percentile
+from recipe_index import RecipeIndex, build_index, load_recipes
+
+CUISINES = ["italian", "mexican", "asian", "indian", "american", "french", "greek", "japanese", "mediterranean"]
+
+
+def vocabulary(size: int) -> list:
+    """Real ingredient names from the seed corpus, padded with synthetic ones"""
+    seed = load_recipes(os.path.join(ROOT, "data", "recipes.jsonl"))
+    names = list(dict.fromkeys(i for r in seed for i in r["ingredients"]))
+    return names + [f"ingredient{i}" for i in range(max(0, size - len(names)))]
+
+
+def synthetic_corpus(n: int, vocab: list, rng: random.Random) -> list:
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    return [
+        {
+            "name": f"Recipe {i}",
+            "cuisine": rng.choice(CUISINES),
+            "ingredients": list(dict.fromkeys(rng.choices(vocab, weights, k=rng.randint(4, 12)))),
+            "time_minutes": rng.randint(5, 120),
+            "serves": rng.randint(1, 6),
+            "steps": ["Prep", "Cook", "Serve"],
+        }
+        for i in range(n)
+    ]
+
+
+def random_queries(vocab: list, queries: int, rng: random.Random, cuisine: bool) -> list:
+    popular = vocab[:200]
+    return [(", ".join(rng.sample(popular, rng.randint(1, 4))), rng.choice(CUISINES) if cuisine else "any")
+            for _ in range(queries)]
+
+
+def time_queries(index: RecipeIndex, queries: list) -> list:
+    latencies = []
+    for ingredients, cuisine in queries:
+        start_time = time.perf_counter()
+        index.search(ingredients, cuisine, k=3)
+        latencies.append(time.perf_counter() - start_time)
+    return latencies
+
+
+def median_ms(passes: list, pct: float) -> float:
+    """The median across repeated passes of one percentile, in ms"""
+    return statistics.median(percentile(latencies, pct) for latencies in passes) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma-separated corpus sizes")
+    parser.add_argument("--vocab", type=int, default=2000, help="distinct ingredients")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=1.0, help="allowed p95 query latency")
+    parser.add_argument("--repeat", type=int, default=5, help="passes over each query set; the median is reported")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = vocabulary(args.vocab)
+    over_budget = []
+    print(f"{'recipes':>9}{'build s':>9}{'file KiB':>10}{'open ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'p95 cuisine ms':>16}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in (int(s) for s in args.sizes.split(",")):
+            path = os.path.join(workdir, f"recipes-{size}.idx")
+            start_time = time.perf_counter()
+            build_index(synthetic_corpus(size, vocab, rng), path)
+            build_s = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            index = RecipeIndex(path)
+            open_ms = (time.perf_counter() - start_time) * 1000
+            plain, filtered = (random_queries(vocab, args.queries, rng, cuisine) for cuisine in (False, True))
+            plain = [time_queries(index, plain) for _ in range(max(1, args.repeat))]
+            filtered = [time_queries(index, filtered) for _ in range(max(1, args.repeat))]
+            p95 = max(median_ms(plain, 95), median_ms(filtered, 95))
+            print(f"{size:>9}{build_s:>9.2f}{os.path.getsize(path) / 1024:>10.0f}{open_ms:>9.2f}"
+                  f"{median_ms(plain, 50):>9.3f}{median_ms(plain, 95):>9.3f}{median_ms(filtered, 95):>16.3f}")
+            if p95 > args.budget_ms:
+                over_budget.append(f"{size} recipes: p95 {p95:.3f}ms > {args.budget_ms}ms")
+            index.close()
+
+    for line in over_budget:
+        print(f"❌ {line}")
+    if over_budget:
+        sys.exit(1)
+    print(f"\n✅ p95 query latency within {args.budget_ms}ms at every size")
+
+
+if __name__ == "__main__":
+    main()
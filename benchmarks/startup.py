@@ -0,0 +1,85 @@
+"""Cold-start benchmark: import time of the project modules and first graph build.
+
+Each measurement runs in a fresh interpreter, so nothing is warm. Results are
+compared against benchmarks/baselines/startup.json and the script exits with
+status 1 when a measurement exceeds its budget.
+
+    python benchmarks/startup.py            # measure and check
+    python benchmarks/startup.py --update   # measure and write new budgets
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "startup.json")
+
+# name -> code run in a fresh interpreter; it prints its own elapsed seconds
+CASES = {
+    "import router": "import router",
+    "import config": "import config",
+    "import tools": "import tools",
+    "import graph_builder": "import graph_builder",
+    "get_graph() cold": "import graph_builder; graph_builder.get_graph()",
+}
+
+TIMER = """
+import time, sys, io, contextlib
+start = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    exec(compile({code!r}, "<bench>", "exec"))
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, repeat: int, workdir: str) -> float:
+    """Best-of-N wall time in seconds for `code` in a fresh interpreter"""
+    env = {**os.environ, "PYTHONPATH": ROOT, "CHECKPOINT_DB": os.path.join(workdir, "bench_state.db")}
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", TIMER.format(code=code)], cwd=workdir, env=env,
+                             capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case (best is kept)")
+    parser.add_argument("--update", action="store_true", help="write measured times (+ headroom) as the new budgets")
+    parser.add_argument("--headroom", type=float, default=1.5, help="budget = measured * headroom when updating")
+    parser.add_argument("--slack", type=float, default=0.05, help="minimum absolute headroom in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {name: measure(code, args.repeat, workdir) for name, code in CASES.items()}
+
+    budgets = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE, encoding="utf-8") as f:
+            budgets = json.load(f)
+
+    failed = False
+    print(f"{'case':<24}{'best (s)':>10}{'budget (s)':>12}")
+    for name, elapsed in results.items():
+        budget = budgets.get(name)
+        over = budget is not None and elapsed > budget
+        failed |= over
+        print(f"{name:<24}{elapsed:>10.3f}{budget if budget is not None else float('nan'):>12.3f}{'  ❌ over budget' if over else ''}")
+
+    if args.update:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, "w", encoding="utf-8") as f:
+            json.dump({name: round(max(t * args.headroom, t + args.slack), 3) for name, t in results.items()}, f, indent=2)
+            f.write("\n")
+        print(f"📝 Budgets written to {os.path.relpath(BASELINE, ROOT)}")
+    elif failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
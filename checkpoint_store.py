@@ -0,0 +1,390 @@
+import asyncio
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from contextlib import closing, contextmanager
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+from config import CHECKPOINT
+
+WRITER_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA wal_autocheckpoint=1000",
+]
+
+READER_PRAGMAS = [
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA query_only=ON",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=268435456",
+]
+
+
+def _trim(cache: OrderedDict, key, size: int):
+    """Mark `key` most recently used and drop the oldest entries beyond `size`"""
+    cache.move_to_end(key)
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+
+def _connect(path: str, pragmas: list) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+class CompressedSerializer(JsonPlusSerializer):
+    """JsonPlusSerializer (msgpack) whose output is zlib-compressed once it reaches `min_size` bytes.
+
+    Compressed blobs are stored with a "+zlib" suffix on their type, so rows
+    written before compression was turned on still load.
+    """
+
+    def __init__(self, level: int = 1, min_size: int = 256, **kwargs):
+        super().__init__(**kwargs)
+        self.level = level
+        self.min_size = min_size
+
+    def dumps_typed(self, obj):
+        type_, data = super().dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        return f"{type_}+zlib", zlib.compress(data, self.level)
+
+    def loads_typed(self, data):
+        type_, blob = data
+        if type_.endswith("+zlib"):
+            type_, blob = type_[:-5], zlib.decompress(blob)
+        return super().loads_typed((type_, blob))
+
+
+class CheckpointStore(SqliteSaver):
+    """SqliteSaver tuned for concurrent sessions.
+
+    Writes go through one WAL-mode writer connection (SqliteSaver's lock keeps it
+    single-writer); reads are served from a pool of read-only connections so they
+    never queue behind writes. Only the newest `keep_last` checkpoints per thread
+    are kept, and a background thread checkpoints the WAL and reclaims free pages.
+    The async checkpoint API runs the same code in worker threads, so the store
+    also works with graph.ainvoke / astream.
+
+    With `snapshot_every` set, list-valued channels (the message history) are
+    stored as deltas: a checkpoint whose parent is the thread's previous one
+    keeps only the items appended since, and every `snapshot_every`-th
+    checkpoint is written in full. Reads rebuild the lists from the nearest
+    snapshot, keeping the last `delta_cache` rebuilt checkpoints in memory, and
+    pruning keeps every snapshot a surviving delta depends on. Per-thread
+    bookkeeping is kept for the `thread_cache` most recently written threads;
+    a thread that falls out just starts its next chain with a snapshot.
+    `compress_level` zlib-compresses stored checkpoints and writes.
+    """
+
+    def __init__(self, path: str = "graph_state.db", readers: int = 4, keep_last: int = 20,
+                 prune_every: int = 10, compact_interval: float = 300, snapshot_every: int = 0,
+                 compress_level: int = 0, delta_cache: int = 256, thread_cache: int = 4096, **kwargs):
+        writer = _connect(path, ["PRAGMA auto_vacuum=INCREMENTAL", *WRITER_PRAGMAS])
+        if compress_level:
+            kwargs.setdefault("serde", CompressedSerializer(compress_level))
+        super().__init__(writer, **kwargs)
+        self.path = path
+        self.keep_last = keep_last
+        self.prune_every = prune_every
+        self.snapshot_every = snapshot_every
+        self.delta_cache = delta_cache
+        self.thread_cache = thread_cache
+        self._delta_lock = threading.Lock()
+        self._chains = OrderedDict()  # (thread_id, checkpoint_ns) -> (last checkpoint id, deltas since its snapshot)
+        self._lists = OrderedDict()  # (thread_id, checkpoint_ns, checkpoint_id) -> {channel: full list}
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            self._readers.put(_connect(path, READER_PRAGMAS))
+        self._reader_count = readers
+
+        self._metrics_lock = threading.Lock()
+        self._write_times = deque(maxlen=1000)
+        self._puts_since_prune = OrderedDict()
+        self.writes = self.pruned = self.compactions = self.delta_writes = 0
+
+        self._stop = threading.Event()
+        self._compactor = None
+        if compact_interval:
+            self._compactor = threading.Thread(target=self._compact_loop, args=(compact_interval,),
+                                               name="checkpoint-compactor", daemon=True)
+            self._compactor.start()
+        atexit.register(self.close)
+
+    @contextmanager
+    def cursor(self, transaction: bool = True):
+        if transaction or not self._reader_count:
+            with super().cursor(transaction) as cur:
+                yield cur
+            return
+
+        if not self.is_setup:
+            with self.lock:
+                self.setup()
+        conn = self._readers.get()
+        cur = conn.cursor()
+        try:
+            yield cur
+        finally:
+            cur.close()
+            self._readers.put(conn)
+
+    def get_tuple(self, config):
+        checkpoint_tuple = super().get_tuple(config)
+        return checkpoint_tuple and self._restore(checkpoint_tuple)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # Deltas are rebuilt one tuple at a time, only as far as the caller iterates
+        for checkpoint_tuple in super().list(config, filter=filter, before=before, limit=limit):
+            yield self._restore(checkpoint_tuple)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        configurable = config["configurable"]
+        key = (str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""))
+        start_time = time.perf_counter()
+        lists = None
+        if self.snapshot_every:
+            checkpoint, metadata, lists, depth = self._encode_deltas(key, configurable.get("checkpoint_id"),
+                                                                     checkpoint, metadata)
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        self._record_write(time.perf_counter() - start_time)
+        if lists is not None:
+            with self._delta_lock:
+                self._chains[key] = (checkpoint["id"], depth)
+                _trim(self._chains, key, self.thread_cache)
+            self._cache_lists((*key, checkpoint["id"]), lists)
+            if depth:
+                with self._metrics_lock:
+                    self.delta_writes += 1
+
+        with self._metrics_lock:
+            self._puts_since_prune[key] = self._puts_since_prune.get(key, 0) + 1
+            due = self.keep_last and self._puts_since_prune[key] >= self.prune_every
+            if due:
+                del self._puts_since_prune[key]
+            else:
+                _trim(self._puts_since_prune, key, self.thread_cache)
+        if due:
+            self.prune(*key)
+        return next_config
+
+    def put_writes(self, config, writes, task_id, *args, **kwargs):
+        start_time = time.perf_counter()
+        super().put_writes(config, writes, task_id, *args, **kwargs)
+        self._record_write(time.perf_counter() - start_time)
+
+    def _encode_deltas(self, key: tuple, parent_id: str, checkpoint: dict, metadata: dict):
+        """(checkpoint, metadata) to store, the full list channels and the delta depth"""
+        channel_values = checkpoint["channel_values"]
+        lists = {channel: list(value) for channel, value in channel_values.items() if isinstance(value, list)}
+        with self._delta_lock:
+            last_id, depth = self._chains.get(key, (None, 0))
+            base = self._lists.get((*key, parent_id)) if parent_id and parent_id == last_id else None
+        if base is None or depth + 1 >= self.snapshot_every:
+            return checkpoint, metadata, lists, 0
+
+        deltas = {}
+        for channel, values in lists.items():
+            previous = base.get(channel)
+            if (previous is not None and len(previous) <= len(values)
+                    and all(a is b or a == b for a, b in zip(previous, values))):
+                deltas[channel] = [len(previous), values[len(previous):]]
+        if not deltas:
+            return checkpoint, metadata, lists, 0
+        stored = {**checkpoint, "channel_values": {c: v for c, v in channel_values.items() if c not in deltas},
+                  "channel_deltas": deltas}
+        return stored, {**metadata, "delta_depth": depth + 1}, lists, depth + 1
+
+    def _cache_lists(self, key: tuple, lists: dict):
+        with self._delta_lock:
+            self._lists[key] = lists
+            _trim(self._lists, key, self.delta_cache)
+
+    @contextmanager
+    def _read_cursor(self):
+        # list() holds a pooled reader while its caller rebuilds deltas, so don't wait for one
+        try:
+            conn, pooled = self._readers.get_nowait(), True
+        except queue.Empty:
+            conn, pooled = _connect(self.path, READER_PRAGMAS), False
+        try:
+            with closing(conn.cursor()) as cur:
+                yield cur
+        finally:
+            if pooled:
+                self._readers.put(conn)
+            else:
+                conn.close()
+
+    def _channel_lists(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str,
+                       parent_id: str = None, checkpoint: dict = None) -> dict:
+        """Full list channels of a stored checkpoint, rebuilt through its delta chain"""
+        key = (thread_id, checkpoint_ns, checkpoint_id)
+        with self._delta_lock:
+            lists = self._lists.get(key)
+            if lists is not None:
+                self._lists.move_to_end(key)
+                return lists
+        if checkpoint is None:
+            with self._read_cursor() as cur:
+                row = cur.execute(
+                    "SELECT parent_checkpoint_id, type, checkpoint FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", key).fetchone()
+            if row is None:
+                raise LookupError(f"checkpoint {checkpoint_id} of thread {thread_id} is missing from {self.path}")
+            parent_id, checkpoint = row[0], self.serde.loads_typed((row[1], row[2]))
+
+        lists = {c: v for c, v in checkpoint["channel_values"].items() if isinstance(v, list)}
+        deltas = checkpoint.get("channel_deltas")
+        if deltas:
+            base = self._channel_lists(thread_id, checkpoint_ns, parent_id)
+            for channel, (start, tail) in deltas.items():
+                lists[channel] = base[channel][:start] + tail
+        self._cache_lists(key, lists)
+        return lists
+
+    def _restore(self, checkpoint_tuple):
+        checkpoint = checkpoint_tuple.checkpoint
+        deltas = checkpoint.get("channel_deltas")
+        if not deltas:
+            return checkpoint_tuple
+        configurable = checkpoint_tuple.config["configurable"]
+        parent_id = checkpoint_tuple.parent_config["configurable"]["checkpoint_id"]
+        lists = self._channel_lists(configurable["thread_id"], configurable["checkpoint_ns"],
+                                    configurable["checkpoint_id"], parent_id, checkpoint)
+        restored = {k: v for k, v in checkpoint.items() if k != "channel_deltas"}
+        restored["channel_values"] = {**checkpoint["channel_values"], **{c: list(lists[c]) for c in deltas}}
+        metadata = {k: v for k, v in checkpoint_tuple.metadata.items() if k != "delta_depth"}
+        return checkpoint_tuple._replace(checkpoint=restored, metadata=metadata)
+
+    def delete_thread(self, thread_id):
+        super().delete_thread(thread_id)
+        with self._delta_lock:
+            for key in [k for k in self._chains if k[0] == str(thread_id)]:
+                del self._chains[key]
+            for key in [k for k in self._lists if k[0] == str(thread_id)]:
+                del self._lists[key]
+        with self._metrics_lock:
+            for key in [k for k in self._puts_since_prune if k[0] == str(thread_id)]:
+                del self._puts_since_prune[key]
+
+    def prune(self, thread_id: str, checkpoint_ns: str = "") -> int:
+        """Delete all but the newest `keep_last` checkpoints (and their writes) for a thread.
+
+        The cutoff moves back to the newest full snapshot at or before it, so
+        surviving delta checkpoints can still be rebuilt.
+        """
+        cutoff = """
+            SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+            AND json_extract(CAST(metadata AS TEXT), '$.delta_depth') IS NULL
+            AND checkpoint_id <= (
+                SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?
+                ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?
+            )
+            ORDER BY checkpoint_id DESC LIMIT 1
+        """
+        params = (thread_id, checkpoint_ns, *(thread_id, checkpoint_ns) * 2, self.keep_last - 1)
+        with self.cursor() as cur:
+            cur.execute(f"DELETE FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ({cutoff})", params)
+            cur.execute(f"DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ({cutoff})", params)
+            deleted = cur.rowcount
+        with self._metrics_lock:
+            self.pruned += max(deleted, 0)
+        return deleted
+
+    def compact(self):
+        """Fold the WAL back into the database and return free pages to the filesystem"""
+        with self.cursor() as cur:
+            cur.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            auto_vacuum = cur.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if auto_vacuum == 2:
+                cur.execute("PRAGMA incremental_vacuum")
+            else:
+                free_pages = cur.execute("PRAGMA freelist_count").fetchone()[0]
+                pages = cur.execute("PRAGMA page_count").fetchone()[0]
+                if pages and free_pages / pages > 0.25:
+                    self.conn.commit()
+                    cur.execute("VACUUM")
+        with self._metrics_lock:
+            self.compactions += 1
+
+    def _compact_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except sqlite3.Error as e:
+                print(f"⚠️ Checkpoint compaction failed: {e}")
+
+    def _record_write(self, elapsed: float):
+        with self._metrics_lock:
+            self.writes += 1
+            self._write_times.append(elapsed)
+
+    def metrics(self) -> dict:
+        """Write latency and on-disk size of the checkpoint database"""
+        with self._metrics_lock:
+            times = sorted(self._write_times)
+            stats = {"writes": self.writes, "delta_writes": self.delta_writes,
+                     "pruned_checkpoints": self.pruned, "compactions": self.compactions}
+
+        def pct(p):
+            return round(times[min(len(times) - 1, int(p / 100 * len(times)))] * 1000, 3) if times else 0.0
+
+        stats.update({"write_ms_p50": pct(50), "write_ms_p95": pct(95), "write_ms_max": pct(100)})
+        stats["db_bytes"] = sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p))
+        return stats
+
+    def close(self):
+        self._stop.set()
+        if self._compactor is not None and self._compactor is not threading.current_thread():
+            self._compactor.join(timeout=5)
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        self._reader_count = 0
+        with self.lock:
+            self.conn.close()
+        atexit.unregister(self.close)
+
+    # Async API for graph.ainvoke/astream: same code, run in worker threads
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, *args, **kwargs):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, *args, **kwargs)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def create_checkpointer(settings: dict = None):
+    """Build the checkpoint backend described by config.CHECKPOINT"""
+    settings = {**CHECKPOINT, **(settings or {})}
+    backend = settings.pop("backend")
+    if backend == "memory":
+        from langgraph.checkpoint.memory import MemorySaver
+        return MemorySaver()
+    if backend == "sqlite":
+        return CheckpointStore(**settings)
+    raise ValueError(f"Unknown checkpoint backend: {backend!r} (expected 'sqlite' or 'memory')")
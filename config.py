@@ -3,41 +3,169 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
-try:
-    from .tools import (
-        MODEL_NAME as DEFAULT_MODEL_NAME,
-        DEMO_MODE as DEFAULT_DEMO_MODE,
-        get_weather,
-        get_stock_price,
-        get_news_headlines,
-        suggest_recipe,
-        convert_units,
-    )
-except Exception:
-    DEFAULT_MODEL_NAME = "demo"
-    DEFAULT_DEMO_MODE = True
-    # Dummy fallbacks so list still builds
-    def _na(*a, **k): raise RuntimeError("Tool unavailable")
-    get_weather = get_stock_price = get_news_headlines = suggest_recipe = convert_units = _na
-
-MODEL_NAME = DEFAULT_MODEL_NAME
-DEMO_MODE = DEFAULT_DEMO_MODE
-
-TOOLS = [
-    get_weather,
-    get_stock_price,
-    get_news_headlines,
-    suggest_recipe,
-    convert_units,
-]
+# Prefer Gemini when credentials exist, otherwise run the local demo pipeline.
+# Config stays import-light: tools (and langchain) are only loaded when asked for.
+HAS_GOOGLE_KEY = bool(os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENAI_API_KEY"))
+MODEL_NAME = os.getenv("MODEL_NAME") or ("google_genai:gemini-2.0-flash" if HAS_GOOGLE_KEY else "demo")
+DEMO_MODE = MODEL_NAME == "demo"
+
+# Per-node model tiers. Drafting and refining use MODEL_NAME; the critique,
+# SEO and summary steps only classify or extract, so they get a smaller,
+# faster model and a cap on output tokens. Each distinct (model, cap) pair is
+# initialized once and shared by the nodes that use it.
+FAST_MODEL_NAME = os.getenv("FAST_MODEL_NAME") or ("google_genai:gemini-2.0-flash-lite" if HAS_GOOGLE_KEY else MODEL_NAME)
+NODE_MODELS = {
+    "draft_agent": MODEL_NAME,
+    "refine_agent": MODEL_NAME,
+    "critique_agent": FAST_MODEL_NAME,
+    "seo_agent": FAST_MODEL_NAME,
+    "summary_agent": FAST_MODEL_NAME,
+}
+NODE_MAX_TOKENS = {
+    "critique_agent": 8,
+    "seo_agent": 64,
+    "summary_agent": 160,
+}
+
+# USD per million (input, output) tokens, used for the per-node cost report
+MODEL_PRICES = {
+    "google_genai:gemini-2.0-flash": (0.10, 0.40),
+    "google_genai:gemini-2.0-flash-lite": (0.075, 0.30),
+}
 
 def tools_functional():
     try:
-        return all(callable(t) for t in TOOLS)
+        from tools import tools
+        return all(callable(t) for t in tools)
     except Exception:
         return False
 
-# If tools not functional, prefer Gemini when credentials exist
-if (os.getenv("GOOGLE_API_KEY") or os.getenv("GOOGLE_GENAI_API_KEY")) and not tools_functional():
-    MODEL_NAME = "google_genai:gemini-2.0-flash"
-    DEMO_MODE = False
\ No newline at end of file
+def __getattr__(name):
+    if name == "TOOLS":
+        from tools import tools
+        return list(tools)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Recipe corpus (JSONL) behind suggest_recipe; its .idx index is rebuilt when older than the corpus
+RECIPE_CORPUS = os.getenv("RECIPE_CORPUS") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recipes.jsonl")
+
+# Price table behind the stock tools (symbol, name, price, change_pct). With a
+# refresh interval (seconds) the file is re-read whenever it changes.
+MARKET_DATA = {
+    "path": os.getenv("MARKET_DATA") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices.csv"),
+    "refresh_interval": float(os.getenv("MARKET_DATA_REFRESH", "0")),
+}
+
+# Checkpoint backend: "sqlite" (WAL, pooled readers, retention + compaction)
+# or "memory" (nothing persisted).
+CHECKPOINT = {
+    "backend": os.getenv("CHECKPOINT_BACKEND", "sqlite"),
+    "path": os.getenv("CHECKPOINT_DB", "graph_state.db"),
+    "readers": 4,             # read-only connections; writes share one connection
+    "keep_last": 20,          # checkpoints kept per thread_id (0 keeps everything)
+    "prune_every": 10,        # prune a thread after this many new checkpoints
+    "compact_interval": 300,  # seconds between WAL checkpoint / vacuum passes (0 disables)
+    "snapshot_every": 10,     # full checkpoint every N steps, message deltas in between (0 always writes full)
+    "compress_level": 1,      # zlib level for stored checkpoints and writes (0 stores them raw)
+    "delta_cache": 256,       # rebuilt checkpoints kept in memory for delta reads
+    "thread_cache": 4096,     # threads whose delta chain / prune counter are kept in memory
+}
+
+# Local critic: drafts under `min_words` or scoring at most `revise_score` are
+# sent to refine, drafts scoring at least `approve_score` are approved, and
+# anything in between still goes to the critique LLM.
+CRITIC_THRESHOLDS = {
+    "enabled": True,
+    "min_words": 50,
+    "target_words": 120,
+    "approve_score": 0.7,
+    "revise_score": 0.3,
+}
+
+# Context budget for the post-draft nodes. Each call gets the current question,
+# the latest draft and a summary of at most `history_messages` earlier messages,
+# all capped at roughly `max_tokens`.
+DEFAULT_CONTEXT_BUDGET = {"max_tokens": 2000, "max_question_tokens": 500, "history_messages": 0}
+CONTEXT_BUDGETS = {
+    "critique_agent": {"max_tokens": 1500},
+    "refine_agent": {"max_tokens": 4000, "history_messages": 6},
+    "seo_agent": {"max_tokens": 1500},
+    "summary_agent": {"max_tokens": 1500},
+}
+
+# Whole-run response cache used by batch mode. Prompts that normalize to the
+# same text, or whose n-gram vectors reach `threshold` cosine similarity and
+# route to the same tool arguments, reuse the stored answer. Entries live for
+# the shortest TTL of the tools the run called (`default_ttl` without tools).
+RESPONSE_CACHE = {
+    "enabled": os.getenv("RESPONSE_CACHE", "1") != "0",
+    "threshold": 0.85,
+    "maxsize": 1024,
+    "default_ttl": 600,
+    "max_candidates": 256,  # most recent same-route entries compared per lookup
+}
+
+# Tool calls from one model turn run concurrently on a bounded pool. A call
+# that exceeds its timeout (seconds) is reported back to the model as an error
+# while the other calls' results are still returned.
+TOOL_EXECUTION = {
+    "max_workers": 8,
+    "default_timeout": 10.0,   # seconds, counted from when a pool thread starts the call
+    "queue_timeout": 30.0,     # seconds a call may wait for a free pool thread
+    "timeouts": {
+        "get_stock_price": 5.0,
+        "get_stock_prices": 5.0,
+        "get_weather": 5.0,
+        "convert_units": 2.0,
+        "convert_units_bulk": 5.0,
+    },
+}
+
+# Per-request time budget (seconds), split across nodes by wall-clock share
+# (SEO and summary run side by side, so they share one slice). A call that
+# runs past the node's p95 latency gets one hedged duplicate; `failure_threshold`
+# consecutive failures open a per-model circuit for `reset_after` seconds.
+# The clock starts when the user's message reaches the draft node and covers tool
+# calls and every later draft round. Callers may also pass an earlier absolute
+# "deadline" (epoch seconds) in configurable.
+RESILIENCE = {
+    "deadline_s": float(os.getenv("REQUEST_DEADLINE", "60")),
+    "node_shares": {
+        "draft_agent": 0.35,
+        "critique_agent": 0.1,
+        "refine_agent": 0.3,
+        "seo_agent": 0.25,
+        "summary_agent": 0.25,
+    },
+    "hedge": True,
+    "hedge_percentile": 95,
+    "hedge_min_samples": 20,
+    "failure_threshold": 5,
+    "reset_after": 30,
+    # Provider call threads per process. A call's budget only starts once it
+    # has a thread; one still queued when its budget is up is dropped without
+    # counting against the provider. Sized for 4 requests at once (SERVER
+    # worker_threads) x 2 side-by-side nodes x a hedge each, doubled because a
+    # call that timed out keeps its thread until the provider answers.
+    "max_workers": int(os.getenv("LLM_CALL_THREADS", "0")) or 4 * 2 * 2 * 2,
+}
+
+# Coalesce LLM calls that arrive within `max_wait` seconds of each other
+# (across sessions) into one batch call of at most `max_batch` prompts.
+LLM_BATCHING = {
+    "enabled": os.getenv("LLM_BATCHING", "0") == "1",
+    "max_batch": 16,
+    "max_wait": 0.005,
+}
+
+# server.py: worker processes (all sharing one WAL-mode checkpoint database),
+# requests each worker runs at once, and queued requests per worker before shedding 503s.
+SERVER = {
+    "host": os.getenv("SERVER_HOST", "127.0.0.1"),
+    "port": int(os.getenv("SERVER_PORT", "8000")),
+    "workers": int(os.getenv("SERVER_WORKERS", "0")) or os.cpu_count() or 1,
+    "worker_threads": 4,
+    "queue_size": 64,
+    "request_timeout": 120,  # seconds before /invoke answers 504
+    "drain_timeout": 30,     # seconds to finish accepted requests on SIGTERM
+}
@@ -0,0 +1,79 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from config import CONTEXT_BUDGETS, DEFAULT_CONTEXT_BUDGET
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) - good enough for budgeting"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def message_text(message) -> str:
+    """Plain text of a message, flattening multi-part content"""
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+
+
+def clip(text: str, max_tokens: int) -> str:
+    """Trim text to roughly max_tokens, keeping the beginning"""
+    max_chars = max(0, max_tokens) * CHARS_PER_TOKEN
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + " …"
+
+
+def rolling_summary(messages: list, max_messages: int, max_tokens: int) -> str:
+    """Condense recent earlier messages to one line each, dropping the oldest first when over budget"""
+    lines = []
+    used = 0
+    for message in reversed(messages):
+        if len(lines) >= max_messages:
+            break
+        if isinstance(message, ToolMessage) or getattr(message, "tool_calls", None):
+            continue
+        text = " ".join(message_text(message).split())
+        if not text:
+            continue
+        role = "User" if isinstance(message, HumanMessage) else "Assistant"
+        line = f"{role}: {clip(text, 60)}"
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(reversed(lines))
+
+
+def build_context(state: dict, node: str, instruction: str) -> list:
+    """Messages for a post-draft node: summary of older turns, current question, latest draft, instruction.
+
+    The size is capped by the node's entry in config.CONTEXT_BUDGETS, so the call
+    stays the same size however long the thread grows.
+    """
+    budget = {**DEFAULT_CONTEXT_BUDGET, **CONTEXT_BUDGETS.get(node, {})}
+    messages = state["messages"]
+
+    turn_start = next((i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)), 0)
+    question = message_text(messages[turn_start]) if messages else ""
+    draft = state.get("draft") or next(
+        (message_text(m) for m in reversed(messages) if isinstance(m, AIMessage) and not m.tool_calls and m.content),
+        "",
+    )
+
+    remaining = budget["max_tokens"] - estimate_tokens(instruction)
+    draft = clip(draft, remaining)
+    remaining -= estimate_tokens(draft)
+    question = clip(question, min(remaining, budget["max_question_tokens"]))
+    remaining -= estimate_tokens(question)
+
+    context = []
+    if budget["history_messages"] and remaining > 0:
+        summary = rolling_summary(messages[:turn_start], budget["history_messages"], remaining)
+        if summary:
+            context.append(SystemMessage(content=f"Earlier conversation (summarized):\n{summary}"))
+    context.append(HumanMessage(content=question))
+    context.append(AIMessage(content=draft))
+    context.append(HumanMessage(content=instruction))
+    return context
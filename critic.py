@@ -0,0 +1,61 @@
+import re
+import threading
+
+from config import CRITIC_THRESHOLDS
+
+_WORD = re.compile(r"\b\w+\b")
+_SENTENCE_END = re.compile(r"[.!?](\s|$)")
+_LIST_ITEM = re.compile(r"^\s*([-*•]|\d+[.)])\s+", re.MULTILINE)
+_NUMBER = re.compile(r"\d")
+
+_lock = threading.Lock()
+_stats = {"local_approve": 0, "local_revise": 0, "llm_fallback": 0}
+
+
+def score_draft(text: str, thresholds: dict = None) -> dict:
+    """Word count, structure and detail heuristics for a draft, combined into a 0-1 score"""
+    thresholds = {**CRITIC_THRESHOLDS, **(thresholds or {})}
+    words = _WORD.findall(text)
+    sentences = len(_SENTENCE_END.findall(text))
+    structured = bool(_LIST_ITEM.search(text)) or "\n\n" in text.strip()
+    distinct_ratio = len({w.lower() for w in words}) / len(words) if words else 0.0
+
+    length = min(len(words) / thresholds["target_words"], 1.0)
+    detail = 0.4 * min(sentences / 3, 1.0) + 0.3 * bool(_NUMBER.search(text)) + 0.3 * min(distinct_ratio / 0.5, 1.0)
+    score = 0.6 * length + 0.2 * structured + 0.2 * detail
+    return {"words": len(words), "sentences": sentences, "structured": structured, "score": round(score, 3)}
+
+
+def local_verdict(text: str, thresholds: dict = None):
+    """'APPROVE' or 'REVISE' when the heuristics are confident, None when the LLM should decide"""
+    thresholds = {**CRITIC_THRESHOLDS, **(thresholds or {})}
+    if not thresholds["enabled"]:
+        verdict = None
+    else:
+        features = score_draft(text, thresholds)
+        if features["words"] < thresholds["min_words"] or features["score"] <= thresholds["revise_score"]:
+            verdict = "REVISE"
+        elif features["score"] >= thresholds["approve_score"]:
+            verdict = "APPROVE"
+        else:
+            verdict = None
+
+    with _lock:
+        if verdict == "APPROVE":
+            _stats["local_approve"] += 1
+        elif verdict == "REVISE":
+            _stats["local_revise"] += 1
+        else:
+            _stats["llm_fallback"] += 1
+    return verdict
+
+
+def critic_stats() -> dict:
+    """How many critiques were decided locally vs. sent to the LLM"""
+    with _lock:
+        stats = dict(_stats)
+    decided = stats["local_approve"] + stats["local_revise"]
+    total = decided + stats["llm_fallback"]
+    stats["llm_calls_avoided"] = decided
+    stats["avoided_rate"] = round(decided / total, 3) if total else 0.0
+    return stats
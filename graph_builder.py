@@ -1,160 +1,199 @@
-from typing import Annotated, TypedDict, Literal
-from langchain.chat_models import init_chat_model
-from langchain_core.messages import SystemMessage, HumanMessage
+from typing import Annotated, TypedDict, Literal, Union
+from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
-from langgraph.prebuilt import ToolNode, tools_condition
-from langgraph.checkpoint.sqlite import SqliteSaver
-import sqlite3
-import time
-from datetime import datetime
+import os
+import threading
 import re
 
 from tools import tools
-from config import MODEL_NAME
+from router import route
+from context import build_context, message_text
+from critic import local_verdict
+from config import NODE_MODELS, NODE_MAX_TOKENS, MODEL_PRICES
+from metrics import track_node, record_usage
 
 class State(TypedDict):
     messages: Annotated[list, add_messages]
-
-# Execution tracking decorator
-def track_node(node_name):
-    def decorator(func):
-        def wrapper(state: State):
-            print(f"🟢 [{datetime.now().strftime('%H:%M:%S')}] ENTER: {node_name}")
-            start_time = time.time()
-
-            result = func(state)
-
-            elapsed = time.time() - start_time
-            print(f"✅ [{datetime.now().strftime('%H:%M:%S')}] EXIT: {node_name} ({elapsed:.2f}s)")
-            return result
-        return wrapper
-    return decorator
-
-def route_to_tool(user_input: str) -> str:
-    """Simple rule-based routing to determine which tool to use based on user input"""
-    input_lower = user_input.lower()
-
-    # Weather patterns
-    if any(word in input_lower for word in ['weather', 'temperature', 'forecast']):
-        # Extract location
-        locations = ['new york', 'london', 'tokyo', 'paris', 'sydney']
-        for location in locations:
-            if location in input_lower:
-                return f"get_weather:{location}"
-        return "get_weather:new york"  # default
-
-    # Stock patterns
-    elif any(word in input_lower for word in ['stock', 'price', 'aapl', 'apple', 'msft', 'microsoft', 'googl', 'google', 'amzn', 'amazon', 'tsla', 'tesla']):
-        symbols = {'apple': 'AAPL', 'microsoft': 'MSFT', 'google': 'GOOGL', 'amazon': 'AMZN', 'tesla': 'TSLA'}
-        for company, symbol in symbols.items():
-            if company in input_lower or symbol.lower() in input_lower:
-                return f"get_stock_price:{symbol}"
-        return "get_stock_price:AAPL"  # default
-
-    # News patterns
-    elif any(word in input_lower for word in ['news', 'headlines', 'latest']):
-        categories = ['technology', 'business', 'sports', 'entertainment', 'health']
-        for category in categories:
-            if category in input_lower:
-                return f"get_news_headlines:{category}"
-        return "get_news_headlines:general"
-
-    # Recipe patterns
-    elif any(word in input_lower for word in ['recipe', 'cook', 'make', 'ingredients']):
-        return f"suggest_recipe:{user_input}"
-
-    # Unit conversion patterns
-    elif any(word in input_lower for word in ['convert', 'to ', 'from ']):
-        return f"convert_units:{user_input}"
-
-    # Default fallback - use weather
-    return f"get_weather:new york"
+    draft: str
+    verdict: str
+    keywords: list
+    meta_description: str
+    degraded: bool
+    deadline: float
+
+def parse_keywords(text: str) -> list:
+    """Split an LLM keyword answer ("Keywords: a, b, c" or a bullet list) into clean keywords"""
+    text = re.sub(r"^\s*(seo\s+)?keywords\s*:", "", text, flags=re.IGNORECASE)
+    keywords = (k.strip(" \t-•*\"'.") for k in re.split(r"[,\n]", text))
+    return [k for k in keywords if k]
 
 def demo_agent_response(user_input: str) -> str:
     """Generate a demo response by directly calling the appropriate tool"""
     try:
-        route = route_to_tool(user_input)
-        tool_name, *args = route.split(':')
+        tool_name, args = route(user_input)
 
         # Find the tool
         tool = next((t for t in tools if t.name == tool_name), None)
         if not tool:
             return f"❌ Tool '{tool_name}' not found. Available tools: {[t.name for t in tools]}"
 
-        # Call the tool with appropriate arguments
-        if tool_name == 'get_weather':
-            result = tool.invoke(args[0] if args else 'New York')
-        elif tool_name == 'get_stock_price':
-            result = tool.invoke(args[0] if args else 'AAPL')
-        elif tool_name == 'get_news_headlines':
-            result = tool.invoke(args[0] if args else 'general')
-        elif tool_name == 'suggest_recipe':
-            result = tool.invoke(args[0] if args else 'chicken, rice')
-        elif tool_name == 'convert_units':
-            # Parse conversion request - for now use default
-            result = tool.invoke(10.0, 'kg', 'lbs')
-        else:
-            result = f"🤖 Demo Mode: I understood you want to use the {tool_name} tool, but I'm not sure how to call it with: {args}"
-
-        return result
+        return tool.invoke(args)
 
     except Exception as e:
         return f"❌ Error in demo mode: {str(e)}"
+
+def fallback_reply(messages: list) -> str:
+    """Answer without the model: this turn's tool results if there are any, else the demo tools"""
+    tool_results = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        tool_results.append(message_text(message))
+    if tool_results:
+        return "\n".join(reversed(tool_results))
+    question = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+    return demo_agent_response(message_text(question) if question else "")
     
 
     
-def create_graph():
+def create_graph(llm=None, checkpointer=None):
+    """Build and compile the assistant graph.
+
+    :param llm: Chat model for every node instead of config.NODE_MODELS (e.g. a fake model for benchmarks)
+    :param checkpointer: Checkpoint saver; defaults to config.CHECKPOINT, False disables persistence
+    """
+    # Model providers, the tool executor and the SQLite saver are imported
+    # here so that importing this module (e.g. for demo_agent_response) stays cheap.
+    from langchain.chat_models import init_chat_model
+    from langgraph.prebuilt import tools_condition
+    from checkpoint_store import create_checkpointer
+    from tool_executor import create_tool_node
+    from llm_batcher import maybe_batching
+    from resilience import Degraded, create_resilience
+
+    # node -> (model name, chat model); one client per model, with each node's token
+    # cap bound on top of it (nodes with the same model and cap share the binding)
+    node_llms = {}
     try:
-        llm = init_chat_model(MODEL_NAME)
-        llm_with_tools = llm.bind_tools(tools)
+        if llm is not None:
+            shared = (type(llm).__name__, maybe_batching(llm))
+            node_llms = {node: shared for node in NODE_MODELS}
+        else:
+            clients, models = {}, {}
+            for node, model in NODE_MODELS.items():
+                if model not in clients:
+                    clients[model] = init_chat_model(model)
+                cap = NODE_MAX_TOKENS.get(node)
+                if (model, cap) not in models:
+                    client = clients[model].bind(max_tokens=cap) if cap else clients[model]
+                    models[(model, cap)] = maybe_batching(client)
+                node_llms[node] = (model, models[(model, cap)])
+        draft_model, draft_llm = node_llms["draft_agent"]
+        llm_with_tools = draft_llm.bind_tools(tools)
         use_demo_mode = False
     except Exception as e:
         print(f"⚠️ API Error: {e}\n🔄 Demo Mode enabled")
         llm_with_tools = None
         use_demo_mode = True
 
-    def call_llm(messages):
-        return {"messages": [llm.invoke(messages)]}
+    # Provider calls run under per-node deadlines, hedging and a circuit breaker.
+    # When they are degraded the draft falls back to the local tools and the
+    # optional steps (critique LLM, refine, SEO, summary) are skipped.
+    resilience = create_resilience()
+
+    # Post-draft nodes only see a bounded context (see context.build_context)
+    # and return just the messages they add.
+    def ask_llm(state, node, instruction):
+        model, node_llm = node_llms[node]
+        response = resilience.call(node, model, node_llm.invoke, build_context(state, node, instruction),
+                                   deadline=state.get("deadline"))
+        record_usage(node, model, response, MODEL_PRICES)
+        return response
+
+    def call_llm(state, node, instruction):
+        return {"messages": [ask_llm(state, node, instruction)]}
 
     @track_node("draft_agent")
     def draft_node(state: State) -> State:
         if use_demo_mode:
             user_input = state["messages"][-1].content
-            return {"messages": [HumanMessage(content=demo_agent_response(user_input))]}
-        return {"messages": [llm_with_tools.invoke(state["messages"])]}
+            reply = demo_agent_response(user_input)
+            return {"messages": [AIMessage(content=reply)], "draft": reply}
+        # The request's clock starts at the user's message; later draft rounds
+        # (after tool calls) spend what is left of it
+        if isinstance(state["messages"][-1], HumanMessage):
+            deadline = resilience.request_deadline()
+        else:
+            deadline = state.get("deadline") or resilience.request_deadline()
+        try:
+            response = resilience.call("draft_agent", draft_model, llm_with_tools.invoke, state["messages"],
+                                       deadline=deadline)
+        except Degraded:
+            reply = fallback_reply(state["messages"])
+            return {"messages": [AIMessage(content=reply)], "draft": reply, "degraded": True, "deadline": deadline}
+        record_usage("draft_agent", draft_model, response, MODEL_PRICES)
+        if response.tool_calls:
+            return {"messages": [response], "degraded": False, "deadline": deadline}
+        return {"messages": [response], "draft": message_text(response), "degraded": False, "deadline": deadline}
 
     @track_node("critique_agent")
     def critique_node(state: State) -> State:
         if use_demo_mode:
-            return {"messages": state["messages"] + [HumanMessage(content="APPROVE")]}
-        msgs = state["messages"] + [HumanMessage(content="Review the text above. If under 50 words or lacking detail respond 'REVISE', else 'APPROVE'.")]
-        return call_llm(msgs)
+            return {"verdict": "APPROVE"}
+        if state.get("degraded"):
+            return {"verdict": "APPROVE"}
+        # Mechanical checks decide most drafts; only ambiguous ones cost an LLM call
+        verdict = local_verdict(state.get("draft", ""))
+        if verdict is None:
+            try:
+                response = ask_llm(state, "critique_agent", "Review the text above. If under 50 words or lacking detail respond 'REVISE', else 'APPROVE'.")
+            except Degraded:
+                return {"verdict": "APPROVE"}
+            verdict = "REVISE" if "REVISE" in message_text(response).upper() else "APPROVE"
+        return {"verdict": verdict}
 
     @track_node("refine_agent")
     def refine_node(state: State) -> State:
         if use_demo_mode:
-            return state
-        msgs = state["messages"] + [HumanMessage(content="Improve and expand while keeping core message.")]
-        return call_llm(msgs)
+            return {}
+        try:
+            update = call_llm(state, "refine_agent", "Improve and expand while keeping core message.")
+        except Degraded:
+            return {}  # keep the unrefined draft
+        update["draft"] = message_text(update["messages"][-1])
+        return update
 
     @track_node("seo_agent")
     def seo_node(state: State) -> State:
         if use_demo_mode:
-            return {"messages": state["messages"] + [HumanMessage(content="Keywords: AI, assistant, tools, demo")]}
-        msgs = state["messages"] + [HumanMessage(content="Extract 5-7 SEO keywords, comma-separated.")]
-        return call_llm(msgs)
+            return {"keywords": ["AI", "assistant", "tools", "demo"]}
+        if state.get("degraded"):
+            return {"keywords": []}
+        try:
+            response = ask_llm(state, "seo_agent", "Extract 5-7 SEO keywords, comma-separated.")
+        except Degraded:
+            return {"keywords": []}
+        return {"keywords": parse_keywords(message_text(response))}
 
     @track_node("summary_agent")
     def summary_node(state: State) -> State:
         if use_demo_mode:
-            return state
-        msgs = state["messages"] + [HumanMessage(content="Write a concise 2-sentence SEO meta description.")]
-        return call_llm(msgs)
-
-    def should_refine(state: State) -> Literal["refine_agent", "seo_agent"]:
-        content = state["messages"][-1].content.upper()
-        return "refine_agent" if "REVISE" in content else "seo_agent"
+            return {}
+        if state.get("degraded"):
+            return {"meta_description": ""}
+        try:
+            response = ask_llm(state, "summary_agent", "Write a concise 2-sentence SEO meta description.")
+        except Degraded:
+            return {"meta_description": ""}
+        return {"meta_description": message_text(response).strip()}
+
+    # SEO and summary only need the final draft, so they run in the same step
+    # and write separate state keys instead of appending chat messages.
+    FINALIZERS = ["seo_agent", "summary_agent"]
+
+    def should_refine(state: State) -> Union[Literal["refine_agent"], list]:
+        return "refine_agent" if state.get("verdict") == "REVISE" else FINALIZERS
 
     builder = StateGraph(State)
     builder.add_node("draft_agent", draft_node)
@@ -162,7 +201,7 @@ def create_graph():
     builder.add_node("refine_agent", refine_node)
     builder.add_node("seo_agent", seo_node)
     builder.add_node("summary_agent", summary_node)
-    builder.add_node("tools", ToolNode(tools))
+    builder.add_node("tools", create_tool_node(tools))
     builder.add_edge(START, "draft_agent")
 
     if use_demo_mode:
@@ -170,13 +209,39 @@ def create_graph():
     else:
         builder.add_conditional_edges("draft_agent", tools_condition, {"tools": "tools", "__end__": "critique_agent"})
         builder.add_edge("tools", "draft_agent")
-        builder.add_conditional_edges("critique_agent", should_refine)
-        builder.add_edge("refine_agent", "seo_agent")
-        builder.add_edge("seo_agent", "summary_agent")
-        builder.add_edge("summary_agent", END)
-
-    conn = sqlite3.connect("graph_state.db", check_same_thread=False)
-    memory = SqliteSaver(conn)
-    return builder.compile(checkpointer=memory)
-
-graph = create_graph()
+        builder.add_conditional_edges("critique_agent", should_refine, ["refine_agent", *FINALIZERS])
+        for node in FINALIZERS:
+            builder.add_edge("refine_agent", node)
+            builder.add_edge(node, END)
+
+    if checkpointer is None:
+        checkpointer = create_checkpointer()
+    graph = builder.compile(checkpointer=None if checkpointer is False else checkpointer)
+    graph.resilience = resilience  # counters and breaker states for reports
+    return graph
+
+_graph = None
+_graph_lock = threading.Lock()
+
+def get_graph():
+    """The compiled graph, built on first use and shared by every thread in the process"""
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = create_graph()
+    return _graph
+
+def _reset_after_fork():
+    # A forked worker must not reuse the parent's SQLite connections; it builds its own graph
+    global _graph, _graph_lock
+    _graph = None
+    _graph_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def __getattr__(name):
+    # Keeps `from graph_builder import graph` working without building at import time
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,105 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from langchain_core.runnables.config import ensure_config
+
+from config import LLM_BATCHING
+from metrics import observe
+
+
+class BatchingChatModel:
+    """Coalesces concurrent invoke() calls on a chat model into batch() calls.
+
+    The first waiting call opens a window of `max_wait` seconds; every call that
+    arrives before it closes (up to `max_batch`) goes out in one `inner.batch()`
+    and each caller gets its own result or exception back. When no batch is in
+    flight the window is skipped, so a lone call is not delayed. The caller's run
+    config (callbacks, tags) travels with its input, so streaming and tracing
+    still see each call. Batch sizes and the time calls spend waiting are
+    recorded as metrics ("llm_batch" kind).
+    """
+
+    def __init__(self, inner, max_batch: int = 16, max_wait: float = 0.005, dispatchers: int = 16):
+        self.inner = inner
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.dispatchers = dispatchers
+        self._queue = queue.Queue()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(dispatchers, thread_name_prefix="llm-batch")
+        self._collector = threading.Thread(target=self._collect, name="llm-batcher", daemon=True)
+        self._collector.start()
+
+    def bind_tools(self, tools, **kwargs):
+        return BatchingChatModel(self.inner.bind_tools(tools, **kwargs), self.max_batch, self.max_wait, self.dispatchers)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def _submit(self, input, config) -> Future:
+        future = Future()
+        self._queue.put((input, ensure_config(config), time.perf_counter(), future))
+        return future
+
+    def invoke(self, input, config=None, **kwargs):
+        if kwargs:
+            # Per-call options (stop words etc.) can't share a batch call
+            return self.inner.invoke(input, config, **kwargs)
+        return self._submit(input, config).result()
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        if kwargs:
+            return await self.inner.ainvoke(input, config, **kwargs)
+        return await asyncio.wrap_future(self._submit(input, config))
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            # Only hold the window open while other batches are running
+            deadline = time.perf_counter() + (self.max_wait if self._in_flight else 0.0)
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            with self._lock:
+                self._in_flight += 1
+            self._pool.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: list):
+        now = time.perf_counter()
+        observe("llm_batch", "size", len(batch))
+        for _, _, queued_at, _ in batch:
+            observe("llm_batch", "queue_delay", now - queued_at)
+        try:
+            results = self.inner.batch([item[0] for item in batch], [item[1] for item in batch], return_exceptions=True)
+        except Exception as e:
+            results = [e] * len(batch)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        for (_, _, _, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def maybe_batching(llm, settings: dict = None):
+    """Wrap `llm` in a BatchingChatModel when config.LLM_BATCHING is enabled"""
+    settings = {**LLM_BATCHING, **(settings or {})}
+    if not settings.pop("enabled"):
+        return llm
+    return BatchingChatModel(llm, **settings)
@@ -1,94 +1,55 @@
 from tools import tools
+from graph_builder import demo_agent_response
+import metrics
+from metrics import format_latency
+from tool_cache import cache_stats
 from datetime import datetime
+import argparse
 import time
+import uuid
 import re
 
-def route_to_tool(user_input: str) -> str:
-    """Simple rule-based routing to determine which tool to use based on user input"""
-    input_lower = user_input.lower()
-
-    # Weather patterns
-    if any(word in input_lower for word in ['weather', 'temperature', 'forecast']):
-        locations = ['new york', 'london', 'tokyo', 'paris', 'sydney']
-        for location in locations:
-            if location in input_lower:
-                return f"get_weather:{location}"
-        return "get_weather:new york"  # default
-
-    # Stock patterns
-    elif any(word in input_lower for word in ['stock', 'price', 'aapl', 'apple', 'msft', 'microsoft', 'googl', 'google', 'amzn', 'amazon', 'tsla', 'tesla']):
-        symbols = {'apple': 'AAPL', 'microsoft': 'MSFT', 'google': 'GOOGL', 'amazon': 'AMZN', 'tesla': 'TSLA'}
-        for company, symbol in symbols.items():
-            if company in input_lower or symbol.lower() in input_lower:
-                return f"get_stock_price:{symbol}"
-        return "get_stock_price:AAPL"  # default
-
-    # News patterns
-    elif any(word in input_lower for word in ['news', 'headlines', 'latest']):
-        categories = ['technology', 'business', 'sports', 'entertainment', 'health']
-        for category in categories:
-            if category in input_lower:
-                return f"get_news_headlines:{category}"
-        return "get_news_headlines:general"
-
-    # Recipe patterns
-    elif any(word in input_lower for word in ['recipe', 'cook', 'make', 'ingredients']):
-        return f"suggest_recipe:{user_input}"
-
-    # Unit conversion patterns
-    elif any(word in input_lower for word in ['convert', 'to ', 'from ']):
-        return f"convert_units:{user_input}"
-
-    # Default fallback
-    return f"get_weather:new york"
-
-def demo_agent_response(user_input: str) -> str:
-    """Generate a demo response by directly calling the appropriate tool"""
-    try:
-        route = route_to_tool(user_input)
-        tool_name, *args = route.split(':')
-
-        # Find the tool
-        tool = next((t for t in tools if t.name == tool_name), None)
-        if not tool:
-            return f"❌ Tool '{tool_name}' not found. Available tools: {[t.name for t in tools]}"
-
-        # Call the tool with appropriate arguments
-        if tool_name == 'get_weather':
-            result = tool.invoke(args[0] if args else 'New York')
-        elif tool_name == 'get_stock_price':
-            result = tool.invoke(args[0] if args else 'AAPL')
-        elif tool_name == 'get_news_headlines':
-            result = tool.invoke(args[0] if args else 'general')
-        elif tool_name == 'suggest_recipe':
-            result = tool.invoke(args[0] if args else 'chicken, rice')
-        elif tool_name == 'convert_units':
-            # Parse conversion request - for now use default
-            result = tool.invoke(10.0, 'kg', 'lbs')
-        else:
-            result = f"🤖 Demo Mode: I understood you want to use the {tool_name} tool, but I'm not sure how to call it with: {args}"
-
-        return result
-
-    except Exception as e:
-        return f"❌ Error in demo mode: {str(e)}"
-
 def main():
-    print("🤖 AI Tool Assistant (Demo Mode)")
+    parser = argparse.ArgumentParser(description="AI Tool Assistant")
+    parser.add_argument("--stream", action="store_true",
+                        help="run the full agent graph and stream the answer token by token")
+    args = parser.parse_args()
+
+    print(f"🤖 AI Tool Assistant ({'Streaming' if args.stream else 'Demo Mode'})")
     print("📊 Available Tools:")
     for tool in tools:
         print(f"  • {tool.name}: {tool.description}")
     print("=" * 50)
 
-    session_stats = []
+    if args.stream:
+        # Imported here so the plain demo loop never pays for building the graph
+        from graph_builder import get_graph
+        from streaming import stream_reply
+        graph = get_graph()
+        thread_id = f"cli-{uuid.uuid4().hex[:8]}"
+    else:
+        metrics.configure(echo=True)
+    latencies = []
+    session_start = time.perf_counter()
 
     while True:
         user_input = input("\n💬 You: ").strip()
 
         if user_input.lower() in ["exit", "quit"]:
-            print(f"\n📈 Session Summary - {len(session_stats)} requests:")
-            for i, stat in enumerate(session_stats, 1):
-                print(f"  {i}. {stat}")
+            session_time = time.perf_counter() - session_start
+            print(f"\n📈 Session Summary - {len(latencies)} requests:")
+            if latencies:
+                print(f"  • Throughput: {len(latencies) / sum(latencies):.2f} prompts/s (processing time)")
+                print(f"  • Latency: {format_latency(latencies)}")
+            print(f"  • Session length: {session_time:.0f}s")
+            for name, stats in cache_stats().items():
+                if stats["hits"] or stats["misses"]:
+                    print(f"  • Cache {name}: {stats['hits']} hits / {stats['misses']} misses, "
+                          f"{stats['evictions']} evicted ({stats['hit_rate']:.0%} hit rate)")
+            for line in metrics.summary_lines(kinds=("stream", "node", "tool")):
+                print(f"  • {line}")
+            for line in metrics.usage_lines():
+                print(f"  • LLM {line}")
             print("👋 Goodbye!")
             break
 
@@ -98,21 +59,28 @@ def main():
 
         # Track execution
         print(f"\n🚀 Processing at {datetime.now().strftime('%H:%M:%S')}")
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
+            if args.stream:
+                stats = stream_reply(graph, user_input, thread_id)
+                latencies.append(stats["total_s"])
+                print("=" * 40)
+                print(f"📊 First token: {stats['ttft_s']:.2f}s | Inter-token p50 {stats['itl_p50_s'] * 1000:.0f}ms"
+                      f" / p95 {stats['itl_p95_s'] * 1000:.0f}ms | Total: {stats['total_s']:.2f}s")
+                continue
+
             response = demo_agent_response(user_input)
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
 
             print(f"\n🤖 Bot: {response}")
             print("=" * 40)
             print(f"📊 Processed in: {elapsed:.2f}s")
 
-            # Store session stats
-            session_stats.append(f"{elapsed:.2f}s - '{user_input[:20]}...'")
+            latencies.append(elapsed)
 
         except Exception as e:
-            elapsed = time.time() - start_time
+            elapsed = time.perf_counter() - start_time
             print(f"❌ Error after {elapsed:.2f}s: {e}")
 
 if __name__ == "__main__":
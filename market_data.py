@@ -0,0 +1,195 @@
+"""Columnar in-memory price table behind the stock tools.
+
+The table is one immutable snapshot: a symbol -> row dict plus parallel
+arrays for price, change % and previous close. Readers grab the current
+snapshot and never lock; refresh() copies the columns, applies only the rows
+that changed and swaps the new snapshot in, so a lookup in progress keeps
+reading the old one. Prices come from a CSV file (symbol, name, price,
+change_pct) standing in for a market feed.
+"""
+import csv
+import os
+import threading
+import time
+from array import array
+from operator import mul
+
+from config import MARKET_DATA
+
+# Company names and tickers the router recognises, matched as whole words.
+# One-letter and word-like tickers (V, KO, BA, DIS) are only reachable by name.
+SYMBOL_ALIASES = {
+    "apple": "AAPL", "aapl": "AAPL",
+    "microsoft": "MSFT", "msft": "MSFT",
+    "google": "GOOGL", "alphabet": "GOOGL", "googl": "GOOGL",
+    "amazon": "AMZN", "amzn": "AMZN",
+    "tesla": "TSLA", "tsla": "TSLA",
+    "nvidia": "NVDA", "nvda": "NVDA",
+    "meta platforms": "META", "facebook": "META",
+    "netflix": "NFLX", "nflx": "NFLX",
+    "amd": "AMD",
+    "intel": "INTC", "intc": "INTC",
+    "oracle": "ORCL", "orcl": "ORCL",
+    "salesforce": "CRM",
+    "adobe": "ADBE", "adbe": "ADBE",
+    "ibm": "IBM",
+    "uber": "UBER",
+    "paypal": "PYPL", "pypl": "PYPL",
+    "jpmorgan": "JPM", "jpm": "JPM",
+    "visa": "V",
+    "walmart": "WMT", "wmt": "WMT",
+    "coca-cola": "KO", "coca cola": "KO", "coke": "KO",
+    "pepsico": "PEP", "pepsi": "PEP",
+    "disney": "DIS",
+    "nike": "NKE", "nke": "NKE",
+    "starbucks": "SBUX", "sbux": "SBUX",
+    "mcdonald's": "MCD", "mcdonalds": "MCD",
+    "boeing": "BA",
+    "exxon": "XOM", "xom": "XOM",
+}
+
+
+class PriceTable:
+    """One immutable snapshot of the market"""
+
+    def __init__(self, symbols: list, names: list, price: array, change_pct: array, version: int = 0):
+        self.symbols = symbols
+        self.names = names
+        self.rows = {symbol: row for row, symbol in enumerate(symbols)}
+        self.price = price
+        self.change_pct = change_pct
+        self.prev_close = array("d", (p / (1 + c / 100) for p, c in zip(price, change_pct)))
+        self.version = version
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def quote(self, symbol: str):
+        """(price, change %) for a symbol, or None"""
+        row = self.rows.get(symbol.strip().upper())
+        return None if row is None else (self.price[row], self.change_pct[row])
+
+    def lookup(self, symbols) -> tuple:
+        """(known symbols, their rows, unknown symbols), duplicates dropped and order kept"""
+        known, rows, unknown = [], [], []
+        for symbol in dict.fromkeys(s.strip().upper() for s in symbols):
+            row = self.rows.get(symbol)
+            if row is None:
+                unknown.append(symbol)
+            else:
+                known.append(symbol)
+                rows.append(row)
+        return known, rows, unknown
+
+    def portfolio(self, rows: list, quantities=None) -> dict:
+        """Value now and at the previous close for `quantities` shares of each row (one share each by default)"""
+        if quantities is None:
+            quantities = [1.0] * len(rows)
+        price = array("d", map(self.price.__getitem__, rows))
+        prev_close = array("d", map(self.prev_close.__getitem__, rows))
+        value = sum(map(mul, quantities, price))
+        previous = sum(map(mul, quantities, prev_close))
+        change = value - previous
+        return {
+            "value": value,
+            "previous": previous,
+            "change": change,
+            "change_pct": change / previous * 100 if previous else 0.0,
+        }
+
+    def updated(self, updates: dict) -> "PriceTable":
+        """Copy of this table with `updates` ({symbol: (price, change %)}) applied; new symbols are appended"""
+        symbols, names = list(self.symbols), list(self.names)
+        price, change_pct = array("d", self.price), array("d", self.change_pct)
+        for symbol, (new_price, new_change) in updates.items():
+            row = self.rows.get(symbol)
+            if row is None:
+                symbols.append(symbol)
+                names.append(symbol)
+                price.append(new_price)
+                change_pct.append(new_change)
+            else:
+                price[row], change_pct[row] = new_price, new_change
+        return PriceTable(symbols, names, price, change_pct, self.version + 1)
+
+
+def load_prices(path: str) -> PriceTable:
+    symbols, names, price, change_pct = [], [], array("d"), array("d")
+    with open(path, newline="", encoding="utf-8") as f:
+        for record in csv.DictReader(f):
+            symbols.append(record["symbol"].strip().upper())
+            names.append(record.get("name") or record["symbol"])
+            price.append(float(record["price"]))
+            change_pct.append(float(record["change_pct"]))
+    return PriceTable(symbols, names, price, change_pct)
+
+
+class MarketData:
+    """Current PriceTable for `path`, refreshed copy-on-write.
+
+    With `refresh_interval` set, a daemon thread re-reads the file whenever
+    its modification time changes; the file is the source of truth, so
+    symbols removed from it stop being quoted.
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 0):
+        self.path = path
+        self._mtime = os.path.getmtime(path)
+        self._table = load_prices(path)
+        self._write_lock = threading.Lock()
+        self.refreshes = 0
+        self._stop = threading.Event()
+        if refresh_interval:
+            threading.Thread(target=self._refresh_loop, args=(refresh_interval,),
+                             name="market-data-refresh", daemon=True).start()
+
+    @property
+    def table(self) -> PriceTable:
+        return self._table
+
+    def refresh(self, updates: dict) -> int:
+        """Apply {symbol: (price, change %)}; returns how many rows changed"""
+        with self._write_lock:
+            table = self._table
+            changed = {}
+            for symbol, (new_price, new_change) in updates.items():
+                symbol = symbol.strip().upper()
+                if table.quote(symbol) != (new_price, new_change):
+                    changed[symbol] = (new_price, new_change)
+            if changed:
+                self._table = table.updated(changed)
+                self.refreshes += 1
+            return len(changed)
+
+    def reload(self) -> int:
+        """Rebuild the table if the file changed since the last load; returns how many rows were added, changed or removed"""
+        mtime = os.path.getmtime(self.path)
+        if mtime == self._mtime:
+            return 0
+        latest = load_prices(self.path)
+        with self._write_lock:
+            table = self._table
+            changed = sum(1 for s, r in latest.rows.items() if table.quote(s) != (latest.price[r], latest.change_pct[r]))
+            changed += len(table.rows.keys() - latest.rows.keys())
+            if changed:
+                latest.version = table.version + 1
+                self._table = latest
+                self.refreshes += 1
+            self._mtime = mtime
+        return changed
+
+    def _refresh_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.reload()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Market data refresh failed: {e}")
+
+    def close(self):
+        self._stop.set()
+
+
+def create_market_data(settings: dict = None) -> MarketData:
+    """MarketData from config.MARKET_DATA"""
+    return MarketData(**{**MARKET_DATA, **(settings or {})})
@@ -0,0 +1,225 @@
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+
+MAX_SAMPLES = 10000
+
+_enabled = os.getenv("ASSISTANT_METRICS", "1") != "0"
+_echo = False
+_sink = None
+_lock = threading.Lock()
+_samples = {}
+_usage = {}
+_current_span = contextvars.ContextVar("current_span", default=None)
+_get_config = None
+
+
+class JsonlSink:
+    """Appends one JSON span record per line to a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def __call__(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def configure(enabled: bool = None, echo: bool = None, sink=None):
+    """Turn recording on/off, echo ENTER/EXIT lines to stdout, or set the span sink.
+
+    :param sink: Callable receiving each span record (e.g. JsonlSink), or a path to a JSONL file
+    """
+    global _enabled, _echo, _sink
+    if enabled is not None:
+        _enabled = enabled
+    if echo is not None:
+        _echo = echo
+    if sink is not None:
+        _sink = JsonlSink(sink) if isinstance(sink, str) else sink
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def format_latency(latencies) -> str:
+    """One-line p50/p95/p99/max summary of latencies in seconds"""
+    return (
+        f"p50 {percentile(latencies, 50):.2f}s | p95 {percentile(latencies, 95):.2f}s"
+        f" | p99 {percentile(latencies, 99):.2f}s | max {max(latencies, default=0.0):.2f}s"
+    )
+
+
+def annotate(**fields):
+    """Attach extra fields (e.g. cache="hit") to the span that is currently running"""
+    span = _current_span.get()
+    if span is not None:
+        span.update(fields)
+
+
+def observe(kind: str, name: str, value: float):
+    """Add one sample to the (kind, name) histogram"""
+    with _lock:
+        samples = _samples.get((kind, name))
+        if samples is None:
+            samples = _samples[(kind, name)] = deque(maxlen=MAX_SAMPLES)
+        samples.append(value)
+
+
+def record_usage(node: str, model: str, message, prices: dict = None):
+    """Add one LLM reply's token usage (and cost, when `prices` knows the model) to the node's totals"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    input_tokens = usage.get("input_tokens", 0)
+    output_tokens = usage.get("output_tokens", 0)
+    price_in, price_out = (prices or {}).get(model, (0.0, 0.0))
+    cost = (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+    with _lock:
+        totals = _usage.get(node)
+        if totals is None:
+            totals = _usage[node] = {"model": model, "calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0}
+        totals["calls"] += 1
+        totals["input_tokens"] += input_tokens
+        totals["output_tokens"] += output_tokens
+        totals["cost_usd"] += cost
+    annotate(model=model, input_tokens=input_tokens, output_tokens=output_tokens, cost_usd=round(cost, 8))
+
+
+def usage() -> dict:
+    """Per-node LLM calls, token totals and cost"""
+    with _lock:
+        return {node: dict(totals) for node, totals in sorted(_usage.items())}
+
+
+def usage_lines() -> list:
+    """Human-readable per-node token usage and cost for session summaries"""
+    return [
+        f"{node} ({totals['model']}): {totals['calls']} calls, {totals['input_tokens']} in / "
+        f"{totals['output_tokens']} out tokens, ${totals['cost_usd']:.4f}"
+        for node, totals in usage().items()
+    ]
+
+
+def _thread_id():
+    global _get_config
+    if _get_config is None:
+        try:
+            from langgraph.config import get_config
+        except ImportError:
+            get_config = lambda: {}
+        _get_config = get_config
+    try:
+        return _get_config().get("configurable", {}).get("thread_id")
+    except RuntimeError:
+        return None
+
+
+def _token_counts(result) -> dict:
+    messages = result.get("messages", []) if isinstance(result, dict) else []
+    counts = {}
+    for message in messages:
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            counts["input_tokens"] = counts.get("input_tokens", 0) + usage.get("input_tokens", 0)
+            counts["output_tokens"] = counts.get("output_tokens", 0) + usage.get("output_tokens", 0)
+    return counts
+
+
+def track(kind: str, name: str):
+    """Time a node or tool with perf_counter, feed the histogram and emit a span record"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+
+            span = {"kind": kind, "name": name, "thread_id": _thread_id()}
+            token = _current_span.set(span)
+            if _echo:
+                print(f"🟢 [{datetime.now().strftime('%H:%M:%S')}] ENTER{' TOOL' if kind == 'tool' else ''}: {name}")
+            start_time = time.perf_counter()
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except Exception as e:
+                span["error"] = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                elapsed = time.perf_counter() - start_time
+                _current_span.reset(token)
+                span["duration_s"] = round(elapsed, 6)
+                span["ts"] = time.time()
+                span.update(_token_counts(result))
+                observe(kind, name, elapsed)
+                if _echo:
+                    print(f"✅ [{datetime.now().strftime('%H:%M:%S')}] EXIT{' TOOL' if kind == 'tool' else ''}: {name} ({elapsed:.2f}s)")
+                if _sink is not None:
+                    _sink(span)
+        return wrapper
+    return decorator
+
+
+def track_node(node_name: str):
+    return track("node", node_name)
+
+
+def track_tool(tool_name: str):
+    return track("tool", tool_name)
+
+
+def snapshot() -> dict:
+    """Count and p50/p95/p99 (seconds) for every recorded histogram"""
+    with _lock:
+        items = [(key, list(samples)) for key, samples in _samples.items()]
+    return {
+        f"{kind}:{name}": {
+            "count": len(samples),
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+        }
+        for (kind, name), samples in sorted(items)
+    }
+
+
+def summary_lines(kinds=("node", "tool")) -> list:
+    """Human-readable p50/p95/p99 per node and tool for session summaries"""
+    lines = []
+    for key, stats in snapshot().items():
+        kind, name = key.split(":", 1)
+        if kind in kinds:
+            lines.append(
+                f"{kind} {name}: n={stats['count']} p50 {stats['p50'] * 1000:.1f}ms"
+                f" | p95 {stats['p95'] * 1000:.1f}ms | p99 {stats['p99'] * 1000:.1f}ms"
+            )
+    return lines
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _usage.clear()
+
+
+if os.getenv("ASSISTANT_METRICS_SINK"):
+    configure(sink=os.getenv("ASSISTANT_METRICS_SINK"))
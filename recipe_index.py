@@ -0,0 +1,454 @@
+"""Ingredient -> recipe inverted index in a compact, memory-mapped file.
+
+    python recipe_index.py build data/recipes.jsonl data/recipes.idx
+    python recipe_index.py search data/recipes.idx "chicken, rice" --cuisine asian
+
+File layout (little-endian):
+    header     magic, version, counts and section offsets
+    cuisines   u16 length + utf-8 name, repeated
+    blocks     u32 first recipe id + u16 cuisine + u16 ingredient count per block of recipes
+    terms      u16 length + utf-8 term + u32 first posting + u32 posting count, sorted by term
+    postings   u32 recipe ids, then u16 impacts, each term's run sorted by recipe id
+    bitmaps    one bit per recipe for each term in at least 1/DENSE of the recipes, in term order
+    recipes    u32 offsets into the blob (n + 1)
+    blob       one JSON object per recipe (name, ingredients, steps, ...)
+
+Only the term and block directories are read at open; postings and recipe
+bodies are read straight from the mapping when a query touches them, so
+opening is cheap and memory is shared between processes.
+
+Recipe ids are numbered by ingredient count, then cuisine, so every term's
+impacts only fall as ids rise: a posting list read in id order is read
+best-first, and each (ingredient count, cuisine) pair is one block of ids.
+Search is MaxScore over chunks of ids. Once the k-th best score is known,
+lists that cannot lift a recipe above it on their own only score the
+recipes other lists produce, recipes that match too few terms are dropped
+with set intersections, and the search stops as soon as no recipe further
+along could enter the top k. Common terms also have a bitmap, so they are
+intersected as big integers instead of being read posting by posting.
+Results are exact; a cuisine filter searches just that cuisine's blocks.
+"""
+import argparse
+from bisect import bisect_left, bisect_right
+from heapq import heappush, heapreplace
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+from array import array
+from functools import lru_cache, reduce
+from operator import and_
+
+MAGIC = b"RIDX"
+VERSION = 3
+HEADER = struct.Struct("<4sHHIIII4Q")  # magic, version, reserved, recipes, terms, cuisines, blocks, 4 section offsets
+BLOCK = struct.Struct("<IHH")  # first recipe id, cuisine, ingredient count
+COVERAGE = 1 << 24  # per-term score bonus, above any realistic sum of u16 impacts
+FIRST_CHUNK = 16  # postings per essential list in the first chunk; doubles up to MAX_CHUNK
+MAX_CHUNK = 1024
+PROBE = 16  # reading a posting into a set costs about 1/PROBE of bisecting a list for one candidate
+DENSE = 128  # terms in at least 1/DENSE of the recipes also get a bitmap
+NONZERO = re.compile(rb"[^\0]")
+
+SYNONYMS = {
+    "scallion": "green onion", "spring onion": "green onion",
+    "cilantro": "coriander", "garbanzo": "chickpea", "garbanzo bean": "chickpea",
+    "capsicum": "bell pepper", "pepper": "bell pepper", "aubergine": "eggplant", "courgette": "zucchini",
+    "prawn": "shrimp", "mince": "ground beef", "minced beef": "ground beef", "hamburger": "ground beef",
+    "spaghetti": "pasta", "macaroni": "pasta", "penne": "pasta", "noodles": "noodle",
+    "chili pepper": "chili", "chilli": "chili", "yoghurt": "yogurt", "stock": "chicken stock",
+    "eggs": "egg", "tomatoes": "tomato", "potatoes": "potato",
+}
+
+DESCRIPTORS = {
+    "fresh", "frozen", "dried", "chopped", "diced", "minced", "sliced", "large", "small", "medium",
+    "boneless", "skinless", "raw", "cooked", "leftover", "some", "a", "an", "the", "of", "and", "or",
+}
+
+
+def _singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("oes"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us")):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(text: str) -> str:
+    """'Fresh Tomatoes' -> 'tomato', 'Scallions' -> 'green onion'"""
+    text = text.strip().lower()
+    if text in SYNONYMS:
+        return SYNONYMS[text]
+    words = [w for w in re.findall(r"[a-z]+", text) if w not in DESCRIPTORS]
+    term = " ".join(_singular(w) for w in words)
+    return SYNONYMS.get(term, term)
+
+
+def normalize_ingredients(ingredients) -> list:
+    """Normalize a comma-separated string or a list, dropping blanks and duplicates (order kept)"""
+    if isinstance(ingredients, str):
+        ingredients = re.split(r",|\band\b|\bwith\b", ingredients)
+    terms = (normalize_ingredient(i) for i in ingredients)
+    return list(dict.fromkeys(t for t in terms if t))
+
+
+def _align(offset: int) -> int:
+    return offset + (-offset) % 4
+
+
+@lru_cache(maxsize=1 << 16)
+def _impact(recipes: int, postings: int, length: int) -> int:
+    """A term's IDF over the square root of the recipe's ingredient count, as a u16"""
+    return min(65535, round(math.log(1 + recipes / postings) / math.sqrt(length) * 10000))
+
+
+def _ones(bits: int, base: int) -> set:
+    """Ids of the set bits, bit 0 standing for id `base`"""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    return {base + 8 * match.start() + bit for match in NONZERO.finditer(data) for bit in range(8) if match[0][0] >> bit & 1}
+
+
+def build_index(recipes: list, path: str):
+    """Write `recipes` (dicts with name, cuisine, ingredients, ...) as an index file at `path`.
+
+    A term's impact for a recipe is its IDF divided by the square root of the
+    recipe's ingredient count, so rare ingredients and short recipes score
+    highest.
+    """
+    if sys.byteorder != "little":
+        raise RuntimeError("recipe index files are little-endian")
+    cuisines = {}
+    entries = []
+    for i, recipe in enumerate(recipes):
+        cuisine = recipe.get("cuisine", "any").strip().lower()
+        terms = normalize_ingredients(recipe["ingredients"])
+        entries.append((len(terms), cuisines.setdefault(cuisine, len(cuisines)), i, terms))
+    # Ids run by ingredient count, so impacts fall as ids rise within every posting list
+    entries.sort()
+
+    blocks = bytearray()
+    postings = {}
+    blob = bytearray()
+    offsets = array("I", [0])
+    for rid, (length, cuisine_id, i, terms) in enumerate(entries):
+        if rid == 0 or entries[rid - 1][:2] != (length, cuisine_id):
+            blocks += BLOCK.pack(rid, cuisine_id, length)
+        for term in terms:
+            postings.setdefault(term, []).append((rid, length))
+        blob += json.dumps(recipes[i], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        offsets.append(len(blob))
+
+    n = len(recipes)
+    ids, impacts = array("I"), array("H")
+    bitmaps = bytearray()
+    directory = bytearray()
+    for term in sorted(postings):
+        encoded = term.encode("utf-8")
+        directory += struct.pack("<H", len(encoded)) + encoded + struct.pack("<II", len(ids), len(postings[term]))
+        for rid, length in postings[term]:
+            ids.append(rid)
+            impacts.append(_impact(n, len(postings[term]), length))
+        if len(postings[term]) * DENSE >= n:
+            bitmap = bytearray((n + 7) // 8)
+            for rid, _ in postings[term]:
+                bitmap[rid >> 3] |= 1 << (rid & 7)
+            bitmaps += bitmap
+
+    cuisine_table = b"".join(struct.pack("<H", len(c.encode())) + c.encode() for c in cuisines)
+    terms_off = HEADER.size + len(cuisine_table) + len(blocks)
+    # Sections holding u32 arrays start on 4-byte boundaries
+    postings_off = _align(terms_off + len(directory))
+    bitmaps_off = postings_off + ids.itemsize * len(ids) + impacts.itemsize * len(impacts)
+    recipes_off = _align(bitmaps_off + len(bitmaps))
+    blob_off = recipes_off + offsets.itemsize * (n + 1)
+
+    # A private temp file per builder, so processes rebuilding at once never share one
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path) or ".")
+    with os.fdopen(fd, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, n, len(postings), len(cuisines), len(blocks) // BLOCK.size,
+                            terms_off, postings_off, recipes_off, blob_off))
+        for offset, data in ((None, cuisine_table), (None, blocks), (None, directory), (postings_off, ids.tobytes()),
+                             (None, impacts.tobytes()), (None, bitmaps), (recipes_off, offsets.tobytes()), (blob_off, blob)):
+            if offset is not None:
+                f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        os.unlink(tmp)
+        raise
+
+
+class RecipeIndex:
+    """Read-only view of an index file built by build_index()"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        (magic, version, _, n, n_terms, n_cuisines, n_blocks,
+         terms_off, postings_off, recipes_off, blob_off) = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} recipe index")
+        self.size = n
+
+        pos = HEADER.size
+        self.cuisines = []
+        for _ in range(n_cuisines):
+            (length,) = struct.unpack_from("<H", view, pos)
+            self.cuisines.append(bytes(view[pos + 2:pos + 2 + length]).decode("utf-8"))
+            pos += 2 + length
+        self._cuisine_ids = {c: i for i, c in enumerate(self.cuisines)}
+        # Each cuisine's (first id, end id) blocks, in id order
+        blocks = [BLOCK.unpack_from(view, pos + BLOCK.size * b) for b in range(n_blocks)]
+        self._ranges = [[] for _ in self.cuisines]
+        for (first, cuisine_id, length), (end, _, _) in zip(blocks, blocks[1:] + [(n, 0, 0)]):
+            self._ranges[cuisine_id].append((first, end, length))
+        # First id of each ingredient count, so a recipe's impacts follow from its id
+        self._length_starts, self._lengths = [], []
+        for first, _, length in blocks:
+            if not self._lengths or length != self._lengths[-1]:
+                self._length_starts.append(first)
+                self._lengths.append(length)
+
+        self.terms = {}
+        pos = terms_off
+        total = 0
+        for _ in range(n_terms):
+            (length,) = struct.unpack_from("<H", view, pos)
+            term = bytes(view[pos + 2:pos + 2 + length]).decode("utf-8")
+            self.terms[term] = struct.unpack_from("<II", view, pos + 2 + length)
+            total = max(total, sum(self.terms[term]))
+            pos += 10 + length
+
+        self._ids = view[postings_off:postings_off + 4 * total].cast("I")
+        self._impacts = view[postings_off + 4 * total:postings_off + 6 * total].cast("H")
+        self._bitmaps = {}
+        pos = postings_off + 6 * total
+        for term, (_, count) in self.terms.items():
+            if count * DENSE >= n:
+                self._bitmaps[term] = view[pos:pos + (n + 7) // 8]
+                pos += (n + 7) // 8
+        self._offsets = view[recipes_off:recipes_off + 4 * (n + 1)].cast("I")
+        self._blob = view[blob_off:]
+
+    def recipe(self, rid: int) -> dict:
+        return json.loads(bytes(self._blob[self._offsets[rid]:self._offsets[rid + 1]]))
+
+    def search(self, ingredients, cuisine: str = "any", k: int = 3) -> list:
+        """Top-k (score, matched terms, recipe) for the given ingredients, best first"""
+        terms = [t for t in normalize_ingredients(ingredients) if t in self.terms]
+        cuisine = (cuisine or "any").strip().lower()
+        if cuisine in ("", "any"):
+            ranges = [(0, self.size, 0)]
+        elif cuisine in self._cuisine_ids:
+            ranges = self._ranges[self._cuisine_ids[cuisine]]
+        else:
+            return []
+        if not terms or k <= 0:
+            return []
+
+        # Min-heap of (score, -id), so on equal scores the lower id ranks higher
+        top = []
+        chunk = FIRST_CHUNK
+        for first, end, length in ranges:
+            # A cuisine's blocks come in ingredient-count order, so once even a
+            # recipe with every term at this length can't beat the k-th best, no later one can
+            if len(top) == k and sum(COVERAGE + _impact(self.size, self.terms[t][1], length) for t in terms) <= top[0][0]:
+                break
+            chunk = self._search_range(terms, first, end, k, top, chunk)
+
+        return [(score % COVERAGE / 10000, [t for t in terms if self._contains(t, -rid)], self.recipe(-rid))
+                for score, rid in sorted(top, reverse=True)]
+
+    def _contains(self, term: str, rid: int) -> bool:
+        start, count = self.terms[term]
+        pos = bisect_left(self._ids, rid, start, start + count)
+        return pos < start + count and self._ids[pos] == rid
+
+    def _search_range(self, terms: list, first: int, end: int, k: int, top: list, chunk: int) -> int:
+        """Push the recipes with ids in [first, end) that enter the top k; returns the chunk size reached"""
+        ids, impacts = self._ids, self._impacts
+        n, length_starts, lengths = self.size, self._length_starts, self._lengths
+        cursors = []  # [position, end of the term's postings in the range, the term's posting count, its bitmap]
+        for term in terms:
+            start, count = self.terms[term]
+            pos = bisect_left(ids, first, start, start + count)
+            stop = bisect_left(ids, end, pos, start + count)
+            if pos < stop:
+                cursors.append([pos, stop, count, self._bitmaps.get(term)])
+
+        base = first  # every cursor is at or past this id
+        while cursors:
+            # Every matched term adds COVERAGE, so recipes using more of the
+            # ingredients always outrank ones that use fewer but rarer ones.
+            # Impacts only fall as ids rise, so the impact under a cursor
+            # bounds what the rest of that list can add.
+            threshold = top[0][0] if len(top) == k else -1
+            cursors.sort(key=lambda c: impacts[c[0]])
+            gains = [COVERAGE + impacts[c[0]] for c in cursors]
+            bound = 0
+            for essential, gain in enumerate(gains):
+                bound += gain
+                if bound > threshold:
+                    break
+            else:
+                return chunk  # nothing further along can enter the top k
+            # Smallest sets of lists whose recipes could still beat the k-th best
+            totals = [0] * (1 << len(gains))
+            for mask in range(1, len(totals)):
+                low = mask & -mask
+                totals[mask] = totals[mask ^ low] + gains[low.bit_length() - 1]
+            sufficient = []
+            for mask in sorted(range(1, len(totals)), key=int.bit_count):
+                if totals[mask] > threshold and not any(mask & m == m for m in sufficient):
+                    sufficient.append(mask)
+
+            # The next chunk holds up to `chunk` postings of each essential
+            # list; a recipe found only in the other lists cannot beat the k-th best
+            hi = min(ids[pos + chunk] if pos + chunk < stop else end for pos, stop, *_ in cursors[essential:])
+            slices = [(pos, bisect_left(ids, hi, pos, stop)) for pos, stop, *_ in cursors]
+            # Lists with a bitmap are taken as a bitset of the chunk's ids, which
+            # costs next to nothing. Of the others, essential lists are read into
+            # sets, and the rest only while that costs less than bisecting them per candidate.
+            bitsets = [None if bitmap is None else
+                       int.from_bytes(bitmap[base >> 3:(hi + 7) >> 3], "little") >> (base & 7) & ((1 << hi - base) - 1)
+                       for *_, bitmap in cursors]
+            members = [set(ids[pos:stop].tolist()) if i >= essential and bitsets[i] is None else None
+                       for i, (pos, stop) in enumerate(slices)]
+            while True:
+                candidates = set()
+                for mask in sufficient:
+                    read = [members[i] for i in range(len(members)) if mask >> i & 1 and members[i] is not None]
+                    dense = [i for i in range(len(bitsets)) if mask >> i & 1 and bitsets[i] is not None]
+                    if read:
+                        found = set.intersection(*read)
+                        for i in dense:
+                            found = self._holding(i, found, cursors, slices)
+                    elif len(dense) == 1:
+                        found = set(ids[slice(*slices[dense[0]])].tolist())
+                    else:
+                        found = _ones(reduce(and_, (bitsets[i] for i in dense)), base)
+                    candidates |= found
+                unread = [i for i, member in enumerate(members) if member is None and bitsets[i] is None]
+                if not unread:
+                    break
+                i = min(unread, key=lambda i: slices[i][1] - slices[i][0])
+                if len(candidates) * len(unread) * PROBE <= slices[i][1] - slices[i][0]:
+                    break
+                members[i] = set(ids[slice(*slices[i])].tolist())
+
+            # Group the candidates by which lists hold them, with set operations
+            # where the list was read
+            groups = {0: candidates}
+            for i, member in enumerate(members):
+                if member is None:
+                    member = self._holding(i, candidates, cursors, slices)
+                split = {}
+                for mask, group in groups.items():
+                    inside = group & member
+                    if inside:
+                        split[mask | 1 << i] = inside
+                    if len(inside) < len(group):
+                        split[mask] = group - inside
+                groups = split
+
+            # Impacts depend only on the term and the recipe's ingredient count,
+            # so every recipe of a group within one ingredient count scores the same
+            for mask, group in groups.items():
+                rids = sorted(group)
+                start = 0
+                while start < len(rids):
+                    at = bisect_right(length_starts, rids[start]) - 1
+                    stop = bisect_left(rids, length_starts[at + 1], start) if at + 1 < len(length_starts) else len(rids)
+                    score = sum(COVERAGE + _impact(n, cursors[i][2], lengths[at]) for i in range(len(cursors)) if mask >> i & 1)
+                    for rid in rids[start:stop]:
+                        if len(top) < k:
+                            heappush(top, (score, -rid))
+                        elif (score, -rid) > top[0]:
+                            heapreplace(top, (score, -rid))
+                        else:
+                            break  # the rest of the run has the same score and higher ids
+                    start = stop
+
+            for cursor, (_, stop) in zip(cursors, slices):
+                cursor[0] = stop
+            cursors = [c for c in cursors if c[0] < c[1]]
+            base = hi
+            chunk = min(chunk * 2, MAX_CHUNK)
+        return chunk
+
+    def _holding(self, i: int, rids: set, cursors: list, slices: list) -> set:
+        """The recipes in `rids` that list `i` of the chunk holds, looked up one by one"""
+        bitmap = cursors[i][3]
+        if bitmap is not None:
+            return {rid for rid in rids if bitmap[rid >> 3] >> (rid & 7) & 1}
+        pos, stop = slices[i]
+        held = set()
+        for rid in sorted(rids):
+            pos = bisect_left(self._ids, rid, pos, stop)
+            if pos < stop and self._ids[pos] == rid:
+                held.add(rid)
+        return held
+
+    def close(self):
+        for view in (self._ids, self._impacts, self._offsets, self._blob, *self._bitmaps.values()):
+            view.release()
+        self._map.close()
+
+
+def load_recipes(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def open_index(corpus: str, path: str = None) -> RecipeIndex:
+    """Open the index for `corpus`, (re)building it first when it is missing or older than the corpus"""
+    path = path or os.path.splitext(corpus)[0] + ".idx"
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(corpus):
+        try:
+            build_index(load_recipes(corpus), path)
+        except OSError:
+            # Read-only checkout: keep the built index in the temp directory instead
+            path = os.path.join(tempfile.gettempdir(), os.path.basename(path))
+            build_index(load_recipes(corpus), path)
+    try:
+        return RecipeIndex(path)
+    except ValueError:
+        # Written by an older version of this module
+        build_index(load_recipes(corpus), path)
+        return RecipeIndex(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="build an index file from a JSONL corpus")
+    build.add_argument("corpus")
+    build.add_argument("index")
+    search = commands.add_parser("search", help="query an index file")
+    search.add_argument("index")
+    search.add_argument("ingredients")
+    search.add_argument("--cuisine", default="any")
+    search.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        recipes = load_recipes(args.corpus)
+        build_index(recipes, args.index)
+        print(f"📦 Indexed {len(recipes)} recipes into {args.index} ({os.path.getsize(args.index) / 1024:.1f} KiB)")
+    else:
+        index = RecipeIndex(args.index)
+        for score, matched, recipe in index.search(args.ingredients, args.cuisine, args.k):
+            print(f"{score:.3f}  {recipe['name']} ({recipe.get('cuisine', 'any')}) - matches {', '.join(matched)}")
+
+
+if __name__ == "__main__":
+    main()
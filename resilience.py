@@ -0,0 +1,234 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import RESILIENCE
+from metrics import annotate, percentile
+
+
+class Degraded(RuntimeError):
+    """The provider call was skipped or abandoned; the node should use its fallback"""
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures, then lets one trial call through every `reset_after` seconds"""
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_after and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def record_skipped(self):
+        """The allowed call never reached the provider; a half-open breaker lets the next one try instead"""
+        with self._lock:
+            self._trial = False
+
+
+class _Started:
+    """Set by the pool thread when it picks a call up, with the monotonic time it did"""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        self.at = None
+        self.event = threading.Event()
+
+    def run(self, fn, *args):
+        self.at = time.monotonic()
+        self.event.set()
+        if self.at > self.deadline:
+            return None  # the caller has given up on it already
+        return fn(*args)
+
+
+class Resilience:
+    """Deadline, hedging and circuit breaking around provider calls.
+
+    A request gets an absolute deadline `deadline_s` from when it starts (see
+    request_deadline; an earlier `deadline` in the run's configurable wins).
+    Each call then gets `node_shares[node]` of `deadline_s`, but never more than
+    what is left of the request's deadline, so tool and checkpoint time and
+    repeated draft rounds all count against it. The budget runs from when a
+    thread of the `max_workers` pool picks the call up; a call still queued
+    after its whole budget is dropped without counting against the provider.
+    When a call is still running after that node's p95 latency, one duplicate
+    is sent and whichever answers first wins. Failures and timeouts feed a
+    circuit breaker per model; while it is open calls fail fast. In every
+    degraded case `call` raises Degraded so the node can fall back locally.
+    """
+
+    def __init__(self, deadline_s: float = 30, node_shares: dict = None, hedge: bool = True,
+                 hedge_percentile: float = 95, hedge_min_samples: int = 20, failure_threshold: int = 5,
+                 reset_after: float = 30, max_workers: int = 32):
+        self.deadline_s = deadline_s
+        self.node_shares = node_shares or {}
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.max_workers = max_workers
+        self.breakers = {}
+        self._latencies = {}
+        self._pool = None
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "hedged": 0, "hedge_wins": 0, "timeouts": 0, "errors": 0, "short_circuited": 0,
+                         "not_started": 0}
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="llm-call")
+        return self._pool
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(model)
+            if breaker is None:
+                breaker = self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_after)
+            return breaker
+
+    @staticmethod
+    def _configured_deadline():
+        try:
+            from langgraph.config import get_config
+            return get_config().get("configurable", {}).get("deadline")
+        except (ImportError, RuntimeError):
+            return None
+
+    def request_deadline(self) -> float:
+        """Absolute deadline (epoch seconds) for a request starting now"""
+        deadline = time.time() + self.deadline_s
+        configured = self._configured_deadline()
+        return deadline if configured is None else min(deadline, configured)
+
+    def budget(self, node: str, deadline: float = None) -> float:
+        """Seconds this node may spend on its provider call, given the request's absolute deadline"""
+        budget = self.deadline_s * self.node_shares.get(node, 1.0)
+        for limit in (deadline, self._configured_deadline()):
+            if limit is not None:
+                budget = min(budget, limit - time.time())
+        return budget
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _hedge_after(self, node: str):
+        samples = self._latencies.get(node)
+        if not self.hedge or not samples or len(samples) < self.hedge_min_samples:
+            return None
+        return percentile(samples, self.hedge_percentile)
+
+    def call(self, node: str, model: str, fn, *args, deadline: float = None):
+        """Run fn(*args) for `node` within its budget; raises Degraded instead of blocking or failing"""
+        breaker = self.breaker(model)
+        if not breaker.allow():
+            self._count("short_circuited")
+            annotate(degraded="circuit_open")
+            raise Degraded(f"circuit open for {model}")
+        budget = self.budget(node, deadline)
+        if budget <= 0:
+            self._count("timeouts")
+            annotate(degraded="deadline")
+            raise Degraded(f"no time left for {node}")
+
+        self._count("calls")
+        # The primary keeps the run context (callbacks, streaming); a hedge runs without it
+        started = _Started(time.monotonic() + budget)
+        primary = self.pool.submit(contextvars.copy_context().run, started.run, fn, *args)
+        if not started.event.wait(budget) and not primary.cancel():
+            started.event.wait()  # picked up just now
+        if started.at is None or started.at > started.deadline:
+            # Waiting for a thread says nothing about the provider, so the breaker doesn't hear of it
+            breaker.record_skipped()
+            self._count("not_started")
+            annotate(degraded="not_started")
+            raise Degraded(f"{node} did not start: all {self.max_workers} provider call threads were busy")
+        # The budget counts from here, still within what is left of the request's deadline
+        start_time = started.at
+        budget = self.budget(node, deadline)
+        pending = {primary}
+        hedge_after = self._hedge_after(node)
+        if hedge_after is not None and hedge_after < budget:
+            done, _ = wait(pending, timeout=max(0.0, hedge_after - (time.monotonic() - start_time)))
+            if not done and breaker.allow():
+                self._count("hedged")
+                pending.add(self.pool.submit(fn, *args))
+
+        error = None
+        while pending:
+            remaining = budget - (time.monotonic() - start_time)
+            done, pending = wait(pending, timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    if future is not primary:
+                        self._count("hedge_wins")
+                    self._record(node, time.monotonic() - start_time)
+                    breaker.record_success()
+                    return future.result()
+                error = future.exception()
+
+        breaker.record_failure()
+        if error is None:
+            self._count("timeouts")
+            annotate(degraded="timeout")
+            raise Degraded(f"{node} exceeded its {budget:.1f}s budget")
+        self._count("errors")
+        annotate(degraded="error")
+        raise Degraded(f"{node} failed: {error}") from error
+
+    def _record(self, node: str, elapsed: float):
+        with self._lock:
+            samples = self._latencies.get(node)
+            if samples is None:
+                samples = self._latencies[node] = deque(maxlen=500)
+            samples.append(elapsed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, "breakers": {model: b.state for model, b in self.breakers.items()}}
+
+
+def create_resilience(settings: dict = None) -> Resilience:
+    """Resilience from config.RESILIENCE"""
+    return Resilience(**{**RESILIENCE, **(settings or {})})
@@ -0,0 +1,280 @@
+import asyncio
+import math
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from config import RESPONSE_CACHE
+from recipe_index import normalize_ingredients
+from router import match
+from tool_cache import ttl_for
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "what", "whats", "s", "like", "in", "at", "for", "me", "please",
+    "tell", "show", "give", "can", "could", "you", "i", "how", "hows", "of", "right", "now", "today", "currently",
+}
+
+# Signed and decimal numbers stay whole ("-40", "3.5"); other punctuation is dropped
+_TOKEN = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?|[^\W\d_]+|\d+")
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?$")
+
+
+def normalize(prompt: str) -> str:
+    """Lowercase, drop punctuation and filler words: "What's the weather like in Tokyo?" -> "weather tokyo" """
+    words = _TOKEN.findall(prompt.lower().replace("'s", ""))
+    return " ".join(w for w in words if w not in STOPWORDS)
+
+
+def numbers(key: str) -> tuple:
+    """Numeric tokens of a normalized prompt, which must match exactly for a similar hit"""
+    return tuple(w for w in key.split() if _NUMBER.match(w))
+
+
+def ngram_vector(text: str, n: int = 3, dims: int = 1 << 16) -> dict:
+    """Unit-length hashed character n-gram vector as a sparse {bucket: weight} dict"""
+    padded = f" {text} "
+    vector = {}
+    for i in range(len(padded) - n + 1):
+        bucket = zlib.crc32(padded[i:i + n].encode()) % dims
+        vector[bucket] = vector.get(bucket, 0.0) + 1.0
+    norm = math.sqrt(sum(w * w for w in vector.values())) or 1.0
+    return {k: w / norm for k, w in vector.items()}
+
+
+def cosine(a: dict, b: dict) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(k, 0.0) for k, w in a.items())
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts chat model calls made during one graph run"""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+
+
+class ResponseCache:
+    """Final answers of whole pipeline runs, reused for the same or near-identical prompts.
+
+    A prompt is only compared with stored prompts that route to the same tool
+    and arguments (so "weather in Tokyo" never matches "weather in London") and
+    contain the same numbers, and matches when the cosine similarity of their
+    hashed n-gram vectors is at least `threshold`. Recipe prompts must name the
+    same set of ingredients. Prompts that match no router intent are only ever
+    answered from an exact match. Entries expire after the shortest TTL of the tools the run
+    used (see tool_cache) and the least recently used are evicted past `maxsize`.
+    Concurrent misses for the same prompt share one run (see join).
+    """
+
+    def __init__(self, threshold: float = 0.85, maxsize: int = 1024, default_ttl: float = 600,
+                 max_candidates: int = 256):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self.max_candidates = max_candidates
+        self._entries = OrderedDict()   # normalized prompt -> entry
+        self._buckets = {}              # route key -> OrderedDict of normalized prompts
+        self._inflight = {}             # normalized prompt -> Future of the run answering it
+        self._lock = threading.Lock()
+        self.exact_hits = self.similar_hits = self.misses = self.coalesced = 0
+        self.evictions = self.expirations = self.saved_llm_calls = 0
+
+    @staticmethod
+    def _route_key(prompt: str):
+        """(tool, arguments) the prompt routes to, or None when it only reaches the fallback tool"""
+        routed = match(prompt)
+        if routed is None:
+            return None
+        tool, args = routed
+        if prompt in args.values():
+            # A free-text argument (the whole prompt): recipes are keyed on their
+            # ingredient set, like the tool's own cache; anything else only matches exactly
+            if tool != "suggest_recipe":
+                return None
+            return tool, frozenset(normalize_ingredients(prompt))
+        return tool, tuple(sorted((k, str(v)) for k, v in args.items()))
+
+    def lookup(self, prompt: str):
+        """Cached result for a sufficiently similar prompt, or None"""
+        key = normalize(prompt)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["expires_at"] <= now:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self.exact_hits += 1
+            else:
+                entry = self._similar(key, now)
+                if entry is not None:
+                    self.similar_hits += 1
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry["key"])
+            self.saved_llm_calls += entry["llm_calls"]
+            return entry["result"]
+
+    def _similar(self, key: str, now: float):
+        route_key = self._route_key(key)
+        bucket = self._buckets.get(route_key) if route_key is not None else None
+        if not bucket:
+            return None
+        vector = ngram_vector(key)
+        key_numbers = numbers(key)
+        best, best_score = None, self.threshold
+        for candidate in list(reversed(bucket))[: self.max_candidates]:
+            entry = self._entries[candidate]
+            if entry["expires_at"] <= now or entry["numbers"] != key_numbers:
+                continue
+            score = cosine(vector, entry["vector"])
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
+
+    def store(self, prompt: str, result: dict, llm_calls: int = 0, tools_used=()):
+        """Remember a finished run's result; the TTL comes from the tools it called"""
+        key = normalize(prompt)
+        route_key = self._route_key(key)
+        # Runs that called no tool (e.g. demo mode answering straight from the router) age like the routed tool
+        routed_tools = [route_key[0]] if route_key is not None else []
+        ttl = min((ttl_for(t, self.default_ttl) for t in (tools_used or routed_tools)), default=self.default_ttl)
+        entry = {
+            "key": key,
+            "route": route_key,
+            "numbers": numbers(key),
+            "vector": ngram_vector(key),
+            "result": result,
+            "llm_calls": llm_calls,
+            "expires_at": time.monotonic() + ttl,
+        }
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            if route_key is not None:
+                self._buckets.setdefault(route_key, OrderedDict())[key] = None
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def join(self, prompt: str):
+        """(future, leader) for a prompt that missed. The leader runs it and calls
+        finish(); concurrent callers with the same normalized prompt wait on the future."""
+        key = normalize(prompt)
+        with self._lock:
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = self._inflight[key] = Future()
+            return flight, True
+
+    def finish(self, prompt: str, flight: Future, result: dict = None, error: BaseException = None):
+        with self._lock:
+            del self._inflight[normalize(prompt)]
+        if error is not None:
+            flight.set_exception(error)
+        else:
+            flight.set_result(result)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        bucket = self._buckets.get(entry["route"])
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._buckets[entry["route"]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "saved_llm_calls": self.saved_llm_calls,
+            }
+
+
+def _turn_tools(messages: list) -> set:
+    """Names of the tools called since the last user message"""
+    tools_used = set()
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, ToolMessage) and message.name:
+            tools_used.add(message.name)
+    return tools_used
+
+
+def final_reply(state: dict) -> str:
+    """Pull the final (approved or refined) draft out of a finished graph state"""
+    if state.get("draft"):
+        return state["draft"]
+    messages = state.get("messages") or []
+    return messages[-1].content if messages else ""
+
+
+def run_result(state: dict) -> dict:
+    """The parts of a finished run worth returning (and caching)"""
+    return {
+        "response": final_reply(state),
+        "keywords": state.get("keywords", []),
+        "meta_description": state.get("meta_description", ""),
+    }
+
+
+async def ainvoke_cached(graph, cache: ResponseCache, prompt: str, config: dict) -> dict:
+    """Answer from the cache when possible, otherwise run the graph and store the result.
+
+    Only suitable for prompts that stand on their own (batch/serving), since a
+    cached answer is not added to the thread's conversation history.
+    """
+    cached = cache.lookup(prompt)
+    if cached is not None:
+        return {**cached, "cached": True}
+    flight, leader = cache.join(prompt)
+    if not leader:
+        return {**await asyncio.wrap_future(flight), "cached": True}
+    counter = LLMCallCounter()
+    config = {**config, "callbacks": [*config.get("callbacks", []), counter]}
+    try:
+        state = await graph.ainvoke({"messages": [HumanMessage(content=prompt)]}, config)
+    except BaseException as e:
+        cache.finish(prompt, flight, error=e)
+        raise
+    result = run_result(state)
+    # A degraded run answered from local fallbacks; the next asker should get the real thing
+    if not state.get("degraded"):
+        cache.store(prompt, result, counter.calls, _turn_tools(state["messages"]))
+    cache.finish(prompt, flight, result)
+    return {**result, "cached": False}
+
+
+def create_response_cache(settings: dict = None):
+    """ResponseCache from config.RESPONSE_CACHE, or None when disabled"""
+    settings = {**RESPONSE_CACHE, **(settings or {})}
+    if not settings.pop("enabled"):
+        return None
+    return ResponseCache(**settings)
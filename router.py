@@ -0,0 +1,215 @@
+import re
+from collections import deque
+from typing import NamedTuple
+
+from market_data import SYMBOL_ALIASES
+from units import UNIT_ALIASES
+
+# Declarative intent table, checked in priority order. `keywords` select the
+# intent, `entities` map surface forms to the tool argument, and when
+# `entity_triggers` is set an entity mention alone is enough to pick the intent.
+# `whole_words` entities must also end at a word boundary. With `bulk_tool`,
+# several entities (or share counts before them) route to that tool instead.
+INTENTS = [
+    {
+        "tool": "get_weather",
+        "arg": "location",
+        "keywords": ["weather", "temperature", "forecast"],
+        "entities": {c.lower(): c for c in ["New York", "London", "Tokyo", "Paris", "Sydney"]},
+        "default": "New York",
+    },
+    {
+        "tool": "get_stock_price",
+        "arg": "symbol",
+        "keywords": ["stock", "price", "portfolio"],
+        "entities": SYMBOL_ALIASES,
+        "entity_triggers": True,
+        "whole_words": True,
+        "bulk_tool": "get_stock_prices",
+        "default": "AAPL",
+    },
+    {
+        "tool": "get_news_headlines",
+        "arg": "category",
+        "keywords": ["news", "headlines", "latest"],
+        "entities": {c: c for c in ["technology", "business", "sports", "entertainment", "health"]},
+        "default": "general",
+    },
+    {
+        "tool": "suggest_recipe",
+        "arg": "ingredients",
+        "keywords": ["recipe", "cook", "make", "ingredients", "dinner", "lunch", "breakfast"],
+    },
+    {
+        "tool": "convert_units",
+        "keywords": ["convert", "to ", "from "],
+        "default": {"value": 10.0, "from_unit": "kg", "to_unit": "lbs"},
+    },
+]
+
+FALLBACK_TOOL = "get_weather"
+
+_NUMBER = r"-?\d+(?:\.\d+)?"
+_CONVERSION = re.compile(
+    rf"({_NUMBER}(?:\s*(?:,|and|,\s*and)\s*{_NUMBER})*)\s*(°?[a-z]+)\s+(?:to|in|into|as)\s+(°?[a-z]+)"
+)
+_HOLDING = re.compile(rf"({_NUMBER})\s*(?:shares?\s+(?:of\s+)?)?$")
+
+
+class Route(NamedTuple):
+    tool: str
+    args: dict
+
+
+class _Automaton:
+    """Aho-Corasick automaton: finds every term occurrence in one pass over the text"""
+
+    def __init__(self, terms: dict):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for term, payload in terms.items():
+            state = 0
+            for ch in term:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state].append((len(term), payload))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def scan(self, text: str):
+        """Yield (start, end, payload) for every term match in text"""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in out[state]:
+                yield i - length + 1, i + 1, payload
+
+
+class Router:
+    """Routes a prompt to a tool and its arguments with one scan of the prompt"""
+
+    def __init__(self, intents: list = INTENTS, fallback: str = FALLBACK_TOOL):
+        self.intents = intents
+        self.fallback = fallback
+        terms = {}
+        for priority, intent in enumerate(intents):
+            for word in intent.get("keywords", []):
+                terms.setdefault(word, []).append((priority, "keyword", None))
+            for surface, value in intent.get("entities", {}).items():
+                terms.setdefault(surface, []).append((priority, "entity", value))
+        self.automaton = _Automaton(terms)
+
+    def route(self, user_input: str, fallback: bool = True) -> Route:
+        """Pick the highest-priority matching intent and extract its arguments.
+
+        When no intent matches this is the fallback tool, or None with `fallback=False`.
+        """
+        text = user_input.lower() + " "
+        triggered = set()
+        entities = {}
+        for start, end, payloads in self.automaton.scan(text):
+            # Terms only match at the start of a word ("apple" not in "pineapple")
+            if start and text[start - 1].isalnum():
+                continue
+            for priority, kind, value in payloads:
+                intent = self.intents[priority]
+                if kind == "entity" and intent.get("whole_words") and text[end].isalnum():
+                    continue
+                if kind == "keyword" or intent.get("entity_triggers"):
+                    triggered.add(priority)
+                if kind == "entity":
+                    # First mention of each value, in prompt order
+                    entities.setdefault(priority, {}).setdefault(value, start)
+
+        if triggered:
+            priority = min(triggered)
+        elif not fallback:
+            return None
+        else:
+            priority = next(p for p, i in enumerate(self.intents) if i["tool"] == self.fallback)
+        intent = self.intents[priority]
+        tool = intent["tool"]
+        if tool == "convert_units":
+            args = parse_conversion(text) or dict(intent["default"])
+            # Several values for the same units go to the bulk tool in one call
+            return Route("convert_units_bulk" if "values" in args else tool, args)
+        found = entities.get(priority)
+        if found and intent.get("bulk_tool"):
+            quantities = parse_quantities(text, found.values())
+            if len(found) > 1 or quantities:
+                args = {"symbols": list(found)}
+                if quantities:
+                    args["quantities"] = quantities
+                return Route(intent["bulk_tool"], args)
+        if "entities" in intent:
+            return Route(tool, {intent["arg"]: next(iter(found)) if found else intent["default"]})
+        return Route(tool, {intent["arg"]: user_input})
+
+    def route_many(self, prompts) -> list:
+        """Route a batch of prompts"""
+        route = self.route
+        return [route(p) for p in prompts]
+
+
+def parse_quantities(text: str, starts) -> list:
+    """Share counts written before each entity ('10 aapl', '5 shares of tesla'), or [] unless every entity has one"""
+    quantities = []
+    for start in starts:
+        match = _HOLDING.search(text, 0, start)
+        if not match:
+            return []
+        quantities.append(float(match.group(1)))
+    return quantities
+
+
+def parse_conversion(text: str):
+    """Extract value/from_unit/to_unit from e.g. 'convert 5 miles to km'.
+
+    Several values ('convert 5, 10 and 20 kg to lbs') come back as `values`.
+    """
+    match = _CONVERSION.search(text.lower())
+    if not match:
+        return None
+    numbers, from_unit, to_unit = match.groups()
+    if from_unit not in UNIT_ALIASES or to_unit not in UNIT_ALIASES:
+        return None
+    units = {"from_unit": UNIT_ALIASES[from_unit], "to_unit": UNIT_ALIASES[to_unit]}
+    values = [float(n) for n in re.findall(_NUMBER, numbers)]
+    if len(values) > 1:
+        return {"values": values, **units}
+    return {"value": values[0], **units}
+
+
+_router = Router()
+
+
+def route(user_input: str) -> Route:
+    """Route a prompt with the shared, prebuilt router"""
+    return _router.route(user_input)
+
+
+def match(user_input: str):
+    """Like route(), but None when the prompt matches no intent instead of the fallback tool"""
+    return _router.route(user_input, fallback=False)
+
+
+def route_many(prompts) -> list:
+    """Route many prompts with the shared, prebuilt router"""
+    return _router.route_many(prompts)
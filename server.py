@@ -0,0 +1,346 @@
+"""Local HTTP/JSON serving mode: one front process, a pool of graph worker processes.
+
+    python server.py --port 8000 --workers 4
+
+    POST /invoke   {"prompt": "...", "thread_id": "optional"} -> final reply, keywords, summary
+    GET  /healthz  200 while every worker is alive and the server is not draining
+    GET  /metrics  queue depths, request counters and latency percentiles
+
+All workers share one WAL-mode SQLite checkpoint database, so a conversation
+survives restarts with a different --workers count. Requests for one thread_id
+still go to the same worker (crc32 of the id) so its turns never contend for
+the database from two processes. Each worker has a bounded queue; when it is
+full, or its worker has died, the request is shed with 503. SIGTERM/SIGINT
+stop accepting work, let queued and running requests finish, then stop the
+workers.
+"""
+import argparse
+import json
+import multiprocessing as mp
+import queue
+import signal
+import sys
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import CHECKPOINT, SERVER
+from metrics import observe, snapshot
+
+LOCK_STRIPES = 64
+
+
+class WorkerUnavailable(Exception):
+    """The worker a request maps to is not running"""
+
+
+def prepare_checkpoints():
+    """Create the shared checkpoint database before the workers start, so they don't race to set it up"""
+    if CHECKPOINT["backend"] != "sqlite":
+        return
+    from checkpoint_store import create_checkpointer
+
+    store = create_checkpointer({"readers": 1, "compact_interval": 0})
+    store.setup()
+    store.close()
+
+
+def _worker_main(index: int, jobs, results, threads: int):
+    """Worker process: build the graph once, then serve jobs on `threads` threads"""
+    from langchain_core.messages import HumanMessage
+
+    from checkpoint_store import create_checkpointer
+    from graph_builder import create_graph
+    from response_cache import run_result
+
+    # The front process handles shutdown; workers just drain their queue
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    # One compactor is enough for the shared database
+    checkpointer = create_checkpointer({"compact_interval": 0} if index else {})
+    graph = create_graph(checkpointer=checkpointer)
+    # Two requests for the same thread_id never run at once (striped, so memory stays bounded)
+    locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def serve():
+        while True:
+            job = jobs.get()
+            if job is None:
+                jobs.put(None)  # let the sibling threads see it too
+                return
+            request_id, prompt, thread_id = job
+            start_time = time.perf_counter()
+            try:
+                with locks[zlib.crc32(thread_id.encode()) % LOCK_STRIPES]:
+                    state = graph.invoke({"messages": [HumanMessage(content=prompt)]},
+                                         {"configurable": {"thread_id": thread_id}})
+                payload = run_result(state)
+            except Exception as e:
+                payload = {"error": f"{type(e).__name__}: {e}"}
+            payload["worker"] = index
+            payload["worker_latency_s"] = round(time.perf_counter() - start_time, 4)
+            results.put((request_id, payload))
+
+    pool = [threading.Thread(target=serve, daemon=True) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    if hasattr(checkpointer, "close"):
+        checkpointer.close()
+
+
+class WorkerPool:
+    """Spawned graph workers, each fed by its own bounded queue"""
+
+    def __init__(self, workers: int, worker_threads: int = 4, queue_size: int = 64):
+        ctx = mp.get_context("spawn")
+        self.results = ctx.Queue()
+        self.queues = [ctx.Queue(queue_size) for _ in range(workers)]
+        self.processes = [
+            ctx.Process(target=_worker_main, args=(i, q, self.results, worker_threads), name=f"graph-worker-{i}", daemon=True)
+            for i, q in enumerate(self.queues)
+        ]
+        self.queue_size = queue_size
+        self._pending = {}  # request_id -> (future, worker index)
+        self._lock = threading.Lock()
+        self.counters = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0, "timed_out": 0}
+        self.in_flight = [0] * workers
+        prepare_checkpoints()
+        for p in self.processes:
+            p.start()
+        self._collector = threading.Thread(target=self._collect, name="result-collector", daemon=True)
+        self._collector.start()
+
+    def worker_for(self, thread_id: str) -> int:
+        return zlib.crc32(thread_id.encode()) % len(self.queues)
+
+    def submit(self, prompt: str, thread_id: str) -> Future:
+        """Queue a request on its thread's worker.
+
+        Raises queue.Full when that worker is saturated and WorkerUnavailable
+        when it has exited.
+        """
+        index = self.worker_for(thread_id)
+        if not self.processes[index].is_alive():
+            with self._lock:
+                self.counters["rejected"] += 1
+            raise WorkerUnavailable(f"Worker {index} is not running")
+        request_id = uuid.uuid4().hex
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = (future, index)
+            self.in_flight[index] += 1
+        try:
+            self.queues[index].put_nowait((request_id, prompt, thread_id))
+        except queue.Full:
+            with self._lock:
+                del self._pending[request_id]
+                self.in_flight[index] -= 1
+                self.counters["rejected"] += 1
+            raise
+        with self._lock:
+            self.counters["accepted"] += 1
+        return future
+
+    def _collect(self):
+        while True:
+            try:
+                item = self.results.get(timeout=1)
+            except queue.Empty:
+                self._fail_dead_workers()
+                continue
+            if item is None:
+                return
+            request_id, payload = item
+            with self._lock:
+                future, _ = self._pending.pop(request_id, (None, None))
+                self.in_flight[payload["worker"]] -= 1
+                self.counters["failed" if "error" in payload else "completed"] += 1
+            if future is not None:
+                future.set_result(payload)
+
+    def _fail_dead_workers(self):
+        """Fail the requests queued on or running in a worker that has exited, instead of leaving them to time out"""
+        dead = {i for i, p in enumerate(self.processes) if not p.is_alive()}
+        if not dead:
+            return
+        with self._lock:
+            lost = [(request_id, future, index) for request_id, (future, index) in self._pending.items() if index in dead]
+            for request_id, _, index in lost:
+                del self._pending[request_id]
+                self.in_flight[index] -= 1
+                self.counters["failed"] += 1
+        for _, future, index in lost:
+            future.set_exception(WorkerUnavailable(f"Worker {index} exited"))
+
+    def forget(self, future: Future):
+        """A request the front gave up on; its result is dropped when it arrives"""
+        with self._lock:
+            self.counters["timed_out"] += 1
+            for request_id, (pending, _) in list(self._pending.items()):
+                if pending is future:
+                    del self._pending[request_id]
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def alive(self) -> list:
+        return [p.is_alive() for p in self.processes]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+            in_flight = list(self.in_flight)
+        return {
+            **counters,
+            "workers": [
+                {"pid": p.pid, "alive": p.is_alive(), "in_flight": in_flight[i], "queued": self.queues[i].qsize()}
+                for i, p in enumerate(self.processes)
+            ],
+            "queue_size": self.queue_size,
+        }
+
+    def close(self, timeout: float = 30):
+        deadline = time.monotonic() + timeout
+        # A dead worker never drains its queue, so only wait for room in live ones
+        for q, p in zip(self.queues, self.processes):
+            if not p.is_alive():
+                continue
+            try:
+                q.put(None, timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Full:
+                pass  # still busy at the deadline: terminated below
+        for p in self.processes:
+            p.join(max(0.0, deadline - time.monotonic()))
+            if p.is_alive():
+                p.terminate()
+        self.results.put(None)
+        self._collector.join(timeout=5)
+
+
+class AssistantServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pool: WorkerPool, request_timeout: float = 120):
+        super().__init__(address, RequestHandler)
+        self.pool = pool
+        self.request_timeout = request_timeout
+        self.draining = False
+        self.started = time.time()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: AssistantServer
+
+    def log_message(self, format, *args):
+        pass  # request counts and latency are in /metrics
+
+    def _reply(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/healthz":
+            alive = self.server.pool.alive()
+            healthy = all(alive) and not self.server.draining
+            status = "draining" if self.server.draining else ("ok" if healthy else "degraded")
+            self._reply(200 if healthy else 503, {"status": status, "workers_alive": sum(alive), "workers": len(alive)})
+        elif self.path == "/metrics":
+            self._reply(200, {
+                "uptime_s": round(time.time() - self.server.started, 1),
+                "draining": self.server.draining,
+                **self.server.pool.stats(),
+                "latency": {key: {k: round(v, 4) for k, v in s.items()} for key, s in snapshot().items() if key.startswith("server:")},
+            })
+        else:
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/invoke":
+            return self._reply(404, {"error": f"Unknown path {self.path}"})
+        if self.server.draining:
+            return self._reply(503, {"error": "Server is draining"}, {"Retry-After": "5"})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            prompt = str(body["prompt"]).strip()
+        except (ValueError, KeyError, TypeError):
+            return self._reply(400, {"error": 'Expected JSON body {"prompt": "...", "thread_id": "optional"}'})
+        if not prompt:
+            return self._reply(400, {"error": "Empty prompt"})
+        thread_id = str(body.get("thread_id") or f"http-{uuid.uuid4().hex[:8]}")
+
+        start_time = time.perf_counter()
+        try:
+            future = self.server.pool.submit(prompt, thread_id)
+        except queue.Full:
+            return self._reply(503, {"error": "Worker queue full, retry later"}, {"Retry-After": "1"})
+        except WorkerUnavailable as e:
+            return self._reply(503, {"error": str(e)}, {"Retry-After": "5"})
+        try:
+            payload = future.result(timeout=self.server.request_timeout)
+        except WorkerUnavailable as e:
+            return self._reply(503, {"error": str(e), "thread_id": thread_id}, {"Retry-After": "5"})
+        except FutureTimeout:
+            self.server.pool.forget(future)
+            return self._reply(504, {"error": f"No reply within {self.server.request_timeout}s", "thread_id": thread_id})
+        latency = time.perf_counter() - start_time
+        observe("server", "invoke", latency)
+        self._reply(500 if "error" in payload else 200,
+                    {"thread_id": thread_id, **payload, "latency_s": round(latency, 4)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=SERVER["host"])
+    parser.add_argument("--port", type=int, default=SERVER["port"])
+    parser.add_argument("--workers", type=int, default=SERVER["workers"], help="graph worker processes")
+    parser.add_argument("--worker-threads", type=int, default=SERVER["worker_threads"], help="concurrent requests per worker")
+    parser.add_argument("--queue-size", type=int, default=SERVER["queue_size"], help="queued requests per worker before 503")
+    args = parser.parse_args()
+
+    pool = WorkerPool(args.workers, args.worker_threads, args.queue_size)
+    server = AssistantServer((args.host, args.port), pool, SERVER["request_timeout"])
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    threading.Thread(target=server.serve_forever, name="http", daemon=True).start()
+    print(f"🚀 Serving on http://{args.host}:{server.server_port} at {datetime.now().strftime('%H:%M:%S')} "
+          f"({args.workers} workers x {args.worker_threads} threads, queue {args.queue_size})", file=sys.stderr)
+    stop.wait()
+
+    # Drain: refuse new work, let accepted requests finish, then stop workers
+    print("🛑 Draining…", file=sys.stderr)
+    server.draining = True
+    deadline = time.monotonic() + SERVER["drain_timeout"]
+    while pool.pending() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    server.shutdown()
+    pool.close(timeout=max(1.0, deadline - time.monotonic()))
+    server.server_close()
+
+    stats = pool.stats()
+    print(f"\n📈 Server Summary - {stats['completed']} completed, {stats['failed']} failed, "
+          f"{stats['rejected']} shed, {stats['timed_out']} timed out", file=sys.stderr)
+    latencies = snapshot().get("server:invoke")
+    if latencies:
+        print(f"  • Latency: p50 {latencies['p50']:.2f}s | p95 {latencies['p95']:.2f}s | p99 {latencies['p99']:.2f}s",
+              file=sys.stderr)
+    print("👋 Stopped", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
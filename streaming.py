@@ -0,0 +1,96 @@
+import sys
+import time
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+from context import message_text
+from metrics import observe, percentile
+
+# Nodes whose LLM output is the user-visible answer and is rendered token by token
+STREAMED_NODES = ("draft_agent", "refine_agent")
+
+AGENT_LABELS = {
+    "draft_agent": "✍️  Drafting",
+    "tools": "🔧 Running tools",
+    "critique_agent": "🧐 Critiquing",
+    "refine_agent": "✨ Refining",
+    "seo_agent": "🔎 Extracting keywords",
+    "summary_agent": "📝 Summarizing",
+}
+
+
+def stream_reply(graph, prompt: str, thread_id: str, out=sys.stdout) -> dict:
+    """Run one prompt with token-level streaming, rendering the answer as it is generated.
+
+    Returns timing stats: time to first token, inter-token latency and total time.
+    """
+    config = {"configurable": {"thread_id": thread_id}}
+    inputs = {"messages": [HumanMessage(content=prompt)]}
+
+    start_time = time.perf_counter()
+    first_token = last_token = None
+    gaps = []
+    tokens = 0
+    streaming_node = None
+    final = {}
+
+    for mode, chunk in graph.stream(inputs, config, stream_mode=["tasks", "messages", "updates"]):
+        if mode == "tasks":
+            # Task start events carry the input; result events carry the output
+            if "input" in chunk:
+                if streaming_node:
+                    out.write("\n")
+                out.write(f"{AGENT_LABELS.get(chunk['name'], chunk['name'])}…\n")
+                out.flush()
+                streaming_node = last_token = None
+
+        elif mode == "messages":
+            message, meta = chunk
+            node = meta.get("langgraph_node")
+            if node not in STREAMED_NODES or not isinstance(message, (AIMessage, AIMessageChunk)):
+                continue
+            if message.tool_calls or getattr(message, "tool_call_chunks", None):
+                continue
+            text = message_text(message)
+            if not text:
+                continue
+            if streaming_node == node and not isinstance(message, AIMessageChunk):
+                continue  # the complete message repeats tokens already shown
+            now = time.perf_counter()
+            if first_token is None:
+                first_token = now
+            elif last_token is not None:
+                gaps.append(now - last_token)
+            last_token = now
+            tokens += 1
+            if streaming_node != node:
+                out.write("🤖 Bot: ")
+                streaming_node = node
+            out.write(text)
+            out.flush()
+
+        elif mode == "updates":
+            for update in chunk.values():
+                if isinstance(update, dict):
+                    final.update({k: v for k, v in update.items() if k in ("draft", "keywords", "meta_description")})
+
+    total = time.perf_counter() - start_time
+    out.write("\n")
+    if final.get("keywords"):
+        out.write(f"🔑 Keywords: {', '.join(final['keywords'])}\n")
+    if final.get("meta_description"):
+        out.write(f"📄 Summary: {final['meta_description']}\n")
+
+    stats = {
+        "ttft_s": (first_token - start_time) if first_token else total,
+        "itl_p50_s": percentile(gaps, 50),
+        "itl_p95_s": percentile(gaps, 95),
+        "tokens": tokens,
+        "total_s": total,
+        "draft": final.get("draft", ""),
+    }
+    observe("stream", "ttft", stats["ttft_s"])
+    observe("stream", "total", total)
+    for gap in gaps:
+        observe("stream", "inter_token", gap)
+    return stats
@@ -0,0 +1,88 @@
+import operator
+from typing import Annotated, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+
+from checkpoint_store import CheckpointStore
+
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+
+
+def reply(state: State) -> dict:
+    return {"messages": [f"reply {len(state['messages'])}"]}
+
+
+def build(store):
+    graph = StateGraph(State)
+    graph.add_node("reply", reply)
+    graph.add_edge(START, "reply")
+    graph.add_edge("reply", END)
+    return graph.compile(checkpointer=store)
+
+
+def open_store(path, **kwargs):
+    return CheckpointStore(str(path), readers=2, keep_last=4, prune_every=3, compact_interval=0,
+                           snapshot_every=3, **kwargs)
+
+
+def snapshot(graph, config):
+    return graph.get_state(config).values, [state.values for state in graph.get_state_history(config)]
+
+
+def check_history(values, history, turns):
+    expected = []
+    for turn in range(turns):
+        expected += [f"user {turn}", f"reply {len(expected) + 1}"]
+    assert values["messages"] == expected
+    assert len(history) >= 4
+    for state in history:
+        assert state["messages"] == expected[:len(state["messages"])]
+
+
+def run(graph, config, turns):
+    for turn in range(turns):
+        graph.invoke({"messages": [f"user {turn}"]}, config)
+
+
+def test_pruned_delta_history_rebuilds(tmp_path):
+    store = open_store(tmp_path / "state.db")
+    graph = build(store)
+    config = {"configurable": {"thread_id": "t1"}}
+    run(graph, config, 12)
+    values, history = snapshot(graph, config)
+    check_history(values, history, 12)
+    metrics = store.metrics()
+    assert metrics["delta_writes"] and metrics["pruned_checkpoints"]
+    store.close()
+
+    reopened = open_store(tmp_path / "state.db")
+    assert snapshot(build(reopened), config) == (values, history)
+    reopened.close()
+
+
+def test_reopened_store_keeps_writing_and_pruning(tmp_path):
+    config = {"configurable": {"thread_id": "t1"}}
+    store = open_store(tmp_path / "state.db")
+    run(build(store), config, 5)
+    store.close()
+
+    reopened = open_store(tmp_path / "state.db")
+    graph = build(reopened)
+    for turn in range(5, 10):
+        graph.invoke({"messages": [f"user {turn}"]}, config)
+    check_history(*snapshot(graph, config), 10)
+    reopened.close()
+
+
+def test_thread_bookkeeping_is_bounded(tmp_path):
+    store = open_store(tmp_path / "state.db", thread_cache=2)
+    graph = build(store)
+    for thread in range(5):
+        run(graph, {"configurable": {"thread_id": f"t{thread}"}}, 2)
+    assert len(store._chains) <= 2 and len(store._puts_since_prune) <= 2
+    for thread in range(5):
+        config = {"configurable": {"thread_id": f"t{thread}"}}
+        check_history(*snapshot(graph, config), 2)
+    store.close()
@@ -0,0 +1,34 @@
+import os
+import time
+
+from market_data import MarketData
+from tools import get_stock_prices
+
+CSV = "symbol,name,price,change_pct\n"
+
+
+def write_prices(path, rows, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(CSV + "".join(f"{s},{s},{p},{c}\n" for s, p, c in rows))
+    os.utime(path, (mtime, mtime))
+
+
+def test_repeated_symbols_add_up():
+    text = get_stock_prices.invoke({"symbols": ["aapl", "AAPL"], "quantities": [10, 5]})
+    single = get_stock_prices.invoke({"symbols": ["AAPL"], "quantities": [15]})
+    assert text.splitlines()[-1] == single.splitlines()[-1]
+    assert text.count("AAPL") == 1
+
+
+def test_reload_drops_symbols_removed_from_the_file(tmp_path):
+    path = os.path.join(tmp_path, "prices.csv")
+    now = time.time()
+    write_prices(path, [("AAA", 10.0, 1.0), ("BBB", 20.0, -1.0)], now - 10)
+    market = MarketData(path)
+    before = market.table
+    write_prices(path, [("AAA", 11.0, 2.0)], now)
+    assert market.reload() == 2
+    assert market.table.quote("AAA") == (11.0, 2.0)
+    assert market.table.quote("BBB") is None
+    assert before.quote("BBB") == (20.0, -1.0)  # readers holding the old snapshot are unaffected
+    assert market.reload() == 0
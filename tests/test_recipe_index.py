@@ -0,0 +1,69 @@
+import os
+import random
+
+from recipe_index import COVERAGE, RecipeIndex, build_index, normalize_ingredients
+
+MANY = 600  # more recipes per term than the first few search chunks cover
+
+
+def recipe(name, cuisine, ingredients):
+    return {"name": name, "cuisine": cuisine, "ingredients": ingredients, "steps": ["Cook"]}
+
+
+def open_built(tmp_path, recipes):
+    path = os.path.join(tmp_path, "recipes.idx")
+    build_index(recipes, path)
+    return RecipeIndex(path)
+
+
+def test_cuisine_filter_sees_past_the_best_postings(tmp_path):
+    # Short (high-impact) french recipes fill the head of "chicken"; the italian ones rank below them
+    recipes = [recipe(f"French {i}", "french", ["chicken", "butter"]) for i in range(MANY)]
+    recipes += [recipe(f"Italian {i}", "italian", ["chicken", "basil", "tomato", "garlic", "olive oil", "pasta"])
+                for i in range(50)]
+    index = open_built(tmp_path, recipes)
+    results = index.search("chicken", "italian", k=3)
+    assert [r["cuisine"] for _, _, r in results] == ["italian"] * 3
+
+
+def test_recipe_matching_every_ingredient_wins_even_with_low_impacts(tmp_path):
+    recipes = [recipe(f"Rice {i}", "asian", ["rice", "egg"]) for i in range(MANY)]
+    recipes += [recipe(f"Beans {i}", "mexican", ["beans", "lime"]) for i in range(MANY)]
+    filler = [f"spice{i}" for i in range(10)]
+    recipes.append(recipe("Rice and beans", "mexican", ["rice", "beans", *filler]))
+    index = open_built(tmp_path, recipes)
+    (_, matched, best), *_ = index.search("rice, beans")
+    assert best["name"] == "Rice and beans"
+    assert matched == ["rice", "bean"]
+
+
+def test_build_leaves_no_temp_files(tmp_path):
+    open_built(tmp_path, [recipe("Toast", "any", ["bread", "butter"])])
+    assert os.listdir(tmp_path) == ["recipes.idx"]
+
+
+def test_search_matches_brute_force_scoring(tmp_path):
+    rng = random.Random(0)
+    common = ["rice", "egg", "garlic", "onion", "tomato", "basil", "lime", "tofu"]
+    rare = ["saffron", "quince", "okra", "sage"]  # too few postings for a bitmap
+    recipes = [recipe(f"Recipe {i}", rng.choice(["french", "italian", "thai"]),
+                      rng.sample(common, rng.randint(1, 5)) + [name for name in rare if rng.random() < 0.005])
+               for i in range(3000)]
+    index = open_built(tmp_path, recipes)
+    names = common + rare
+
+    def brute(terms, cuisine, k):
+        scores = {}
+        for term in terms:
+            start, count = index.terms[term]
+            for rid, impact in zip(index._ids[start:start + count].tolist(), index._impacts[start:start + count].tolist()):
+                scores[rid] = scores.get(rid, 0) + COVERAGE + impact
+        ranked = sorted((-score, rid) for rid, score in scores.items()
+                        if cuisine == "any" or index.recipe(rid)["cuisine"] == cuisine)
+        return [(-score % COVERAGE, index.recipe(rid)["name"]) for score, rid in ranked[:k]]
+
+    for _ in range(200):
+        query = rng.sample(names, rng.randint(1, 5))
+        cuisine, k = rng.choice(["any", "french", "thai"]), rng.choice([1, 3, 10])
+        got = [(round(score * 10000), r["name"]) for score, _, r in index.search(", ".join(query), cuisine, k)]
+        assert got == brute(normalize_ingredients(query), cuisine, k), (query, cuisine, k)
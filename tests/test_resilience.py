@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from resilience import Degraded, Resilience
+
+
+def test_budget_is_capped_by_the_request_deadline():
+    resilience = Resilience(deadline_s=60, node_shares={"draft_agent": 0.5})
+    assert resilience.budget("draft_agent") == pytest.approx(30)
+    assert resilience.budget("draft_agent", deadline=time.time() + 2) == pytest.approx(2, abs=0.1)
+
+
+def test_call_after_the_deadline_degrades_without_calling():
+    resilience = Resilience(deadline_s=60)
+    calls = []
+    with pytest.raises(Degraded):
+        resilience.call("draft_agent", "model", calls.append, "prompt", deadline=time.time() - 1)
+    assert calls == []
+    assert resilience.stats()["timeouts"] == 1
+
+
+def test_request_deadline_starts_now():
+    resilience = Resilience(deadline_s=5)
+    assert resilience.request_deadline() == pytest.approx(time.time() + 5, abs=0.1)
+
+
+def test_budget_starts_when_a_thread_picks_the_call_up():
+    # 2 threads for 8 calls of 0.3s each: the later calls queue for 0.3s before their 0.5s budget starts
+    resilience = Resilience(deadline_s=0.5, max_workers=2, hedge=False)
+
+    def call(_):
+        try:
+            return resilience.call("draft_agent", "model", time.sleep, 0.3)
+        except Degraded as e:
+            return str(e)
+
+    with ThreadPoolExecutor(8) as callers:
+        results = list(callers.map(call, range(8)))
+    stats = resilience.stats()
+    assert stats["timeouts"] == 0 and stats["errors"] == 0
+    assert results.count(None) >= 4
+    assert all(r is None or "did not start" in r for r in results)
+    assert stats["not_started"] == 8 - results.count(None)
+    assert stats["breakers"]["model"] == "closed"
@@ -0,0 +1,84 @@
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from response_cache import ResponseCache, ainvoke_cached, normalize
+
+
+def cache_with(*prompts):
+    cache = ResponseCache(threshold=0.85)
+    for prompt in prompts:
+        cache.store(prompt, {"response": prompt})
+    return cache
+
+
+def test_normalize_keeps_signed_and_decimal_numbers():
+    assert normalize("Convert 3.50 kg to lbs") == "convert 3.50 kg to lbs"
+    assert normalize("convert -40 C to F?") == "convert -40 c to f"
+    assert normalize("What's the weather like in Tokyo?") == "weather tokyo"
+
+
+def test_decimal_point_is_not_dropped():
+    cache = cache_with("convert 3.5 kg to lbs")
+    assert cache.lookup("convert 35 kg to lbs") is None
+
+
+def test_sign_is_not_dropped():
+    cache = cache_with("convert 40 c to f")
+    assert cache.lookup("convert -40 c to f") is None
+
+
+def test_similar_prompts_need_the_same_numbers():
+    cache = cache_with("please convert 5 miles to km")
+    assert cache.lookup("convert 5 miles to km") == {"response": "please convert 5 miles to km"}
+    assert cache.lookup("convert 6 miles to km") is None
+
+
+def test_unrouted_prompts_only_match_exactly():
+    cache = cache_with("write a short poem about cats")
+    assert cache.lookup("write a short poem about bats") is None
+    assert cache.lookup("Write a short poem about cats!") == {"response": "write a short poem about cats"}
+
+
+def test_routed_prompts_still_match_when_similar():
+    cache = cache_with("weather forecast for tokyo")
+    assert cache.lookup("weather forecasts for tokyo") is not None
+    assert cache.lookup("weather forecasts for london") is None
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_recipe_prompts_need_the_same_ingredients():
+    cache = cache_with("suggest a recipe with chicken and rice")
+    assert cache.lookup("suggest a recipe with beef and rice") is None
+    assert cache.lookup("suggest a recipe with rice and chicken") is not None
+
+
+class FakeGraph:
+    def __init__(self, degraded=False):
+        self.runs = 0
+        self.degraded = degraded
+
+    async def ainvoke(self, inputs, config):
+        self.runs += 1
+        await asyncio.sleep(0.05)
+        reply = f"answer {self.runs}"
+        return {"messages": [*inputs["messages"], AIMessage(content=reply)], "draft": reply, "degraded": self.degraded}
+
+
+def test_concurrent_misses_for_one_prompt_share_a_run():
+    async def main():
+        return await asyncio.gather(*(ainvoke_cached(graph, cache, "write a poem about cats", {}) for _ in range(3)))
+
+    graph, cache = FakeGraph(), ResponseCache()
+    results = asyncio.run(main())
+    assert graph.runs == 1
+    assert [r["response"] for r in results] == ["answer 1"] * 3
+    assert cache.stats()["coalesced"] == 2
+
+
+def test_degraded_runs_are_not_cached():
+    graph, cache = FakeGraph(degraded=True), ResponseCache()
+    asyncio.run(ainvoke_cached(graph, cache, "write a poem about cats", {}))
+    asyncio.run(ainvoke_cached(graph, cache, "write a poem about cats", {}))
+    assert graph.runs == 2
+    assert cache.stats()["size"] == 0
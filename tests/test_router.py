@@ -0,0 +1,34 @@
+import pytest
+
+from router import Route, Router, match, route, route_many
+
+CASES = [
+    ("weather in Tokyo", Route("get_weather", {"location": "Tokyo"})),
+    ("what's the apple stock price", Route("get_stock_price", {"symbol": "AAPL"})),
+    ("price of aapl and tesla", Route("get_stock_prices", {"symbols": ["AAPL", "TSLA"]})),
+    ("10 aapl and 5 shares of msft",
+     Route("get_stock_prices", {"symbols": ["AAPL", "MSFT"], "quantities": [10.0, 5.0]})),
+    ("latest sports news", Route("get_news_headlines", {"category": "sports"})),
+    ("pineapple recipe", Route("suggest_recipe", {"ingredients": "pineapple recipe"})),
+    ("convert 5 miles to km", Route("convert_units", {"value": 5.0, "from_unit": "miles", "to_unit": "km"})),
+    ("convert 5, 10 and 20 kg to lbs",
+     Route("convert_units_bulk", {"values": [5.0, 10.0, 20.0], "from_unit": "kg", "to_unit": "lbs"})),
+]
+
+
+@pytest.mark.parametrize("prompt,expected", CASES)
+def test_route(prompt, expected):
+    assert route(prompt) == expected
+    assert match(prompt) == expected
+    assert Router().route(prompt, fallback=False) == expected
+
+
+def test_unmatched_prompt_uses_the_fallback_unless_disabled():
+    assert route("write a poem") == Route("get_weather", {"location": "New York"})
+    assert match("write a poem") is None
+    assert Router().route("write a poem", fallback=False) is None
+
+
+def test_route_many_matches_route():
+    prompts = [prompt for prompt, _ in CASES]
+    assert route_many(prompts) == [expected for _, expected in CASES]
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+
+from tool_executor import ToolExecutor
+
+
+@tool
+def slow(seconds: float) -> str:
+    """Sleep for `seconds`"""
+    time.sleep(seconds)
+    return "done"
+
+
+def turn(*seconds) -> dict:
+    calls = [{"name": "slow", "args": {"seconds": s}, "id": f"call-{i}"} for i, s in enumerate(seconds)]
+    return {"messages": [AIMessage(content="", tool_calls=calls)]}
+
+
+def test_timeout_is_counted_from_when_the_call_starts():
+    # One thread: the second call waits 0.3s in the queue, then runs 0.3s of its 0.5s timeout
+    executor = ToolExecutor([slow], max_workers=1, default_timeout=0.5)
+    messages = executor.invoke(turn(0.3, 0.3))["messages"]
+    assert [m.content for m in messages] == ["done", "done"]
+    executor.shutdown()
+
+
+def test_async_timeout_is_counted_from_when_the_call_starts():
+    executor = ToolExecutor([slow], max_workers=1, default_timeout=0.5)
+    messages = asyncio.run(executor.ainvoke(turn(0.3, 0.3)))["messages"]
+    assert [m.content for m in messages] == ["done", "done"]
+    executor.shutdown()
+
+
+def test_running_calls_still_time_out():
+    executor = ToolExecutor([slow], max_workers=2, default_timeout=0.1)
+    messages = executor.invoke(turn(0.3, 0.01))["messages"]
+    assert "timed out after 0.1s" in messages[0].content
+    assert messages[1].content == "done"
+    executor.shutdown()
+
+
+def test_call_that_never_gets_a_thread_is_reported_as_not_started():
+    executor = ToolExecutor([slow], max_workers=1, default_timeout=1.0, queue_timeout=0.1)
+    messages = executor.invoke(turn(0.3, 0.01))["messages"]
+    assert messages[0].content == "done"
+    assert "did not start" in messages[1].content and messages[1].status == "error"
+    executor.shutdown()
@@ -0,0 +1,138 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import metrics
+
+_caches = {}
+
+
+class _Flight:
+    """An in-progress computation that concurrent callers for the same key wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ToolCache:
+    """Bounded LRU cache with a per-entry TTL and single-flight misses"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 256):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.coalesced = 0
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value, "hit"
+                del self._entries[key]
+                self.expirations += 1
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, "coalesced"
+
+        ok = False
+        try:
+            flight.result = compute()
+            ok = True
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if ok:
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.maxsize:
+                        self._entries.popitem(last=False)
+                        self.evictions += 1
+            flight.done.set()
+        return flight.result, "miss"
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            }
+
+
+def cached_tool(name: str, ttl: float, maxsize: int = 256, key=None):
+    """Cache a tool function's results.
+
+    :param name: Cache name, normally the tool name
+    :param ttl: Seconds a result stays fresh
+    :param maxsize: Entries kept before least-recently-used ones are evicted
+    :param key: Called with the tool's arguments by name; returns a hashable cache key
+    """
+    def decorator(func):
+        cache = _caches[name] = ToolCache(name, ttl, maxsize)
+        signature = inspect.signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            cache_key = key(**bound.arguments) if key else tuple(bound.arguments.items())
+            result, outcome = cache.get_or_compute(cache_key, lambda: func(*args, **kwargs))
+            metrics.annotate(cache=outcome)
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def ttl_for(name: str, default: float = 0.0) -> float:
+    """TTL configured for a cached tool"""
+    cache = _caches.get(name)
+    return cache.ttl if cache else default
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters for every cached tool"""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def clear_caches():
+    for cache in _caches.values():
+        cache.clear()
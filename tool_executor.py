@@ -0,0 +1,165 @@
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from langchain_core.messages import ToolMessage
+
+from config import TOOL_EXECUTION
+
+
+class ToolExecutor:
+    """Runs every tool call of one AI message at the same time, each with its own timeout.
+
+    Calls go to a bounded thread pool (or straight to the tool's coroutine when
+    it has a native async version), so a turn with several tool calls takes as
+    long as the slowest call instead of the sum. The pool is shared by every
+    session, so a call's timeout is counted from when a pool thread picks it
+    up, not from when it was queued. A call that runs past its timeout is
+    answered with an error ToolMessage and the others still return; so is one
+    that waits longer than `queue_timeout` (or past the request's deadline)
+    for a free thread. A timed-out sync tool cannot be interrupted; its thread
+    finishes in the background and the result is discarded.
+    """
+
+    def __init__(self, tools: list, max_workers: int = 8, default_timeout: float = 10.0, timeouts: dict = None,
+                 queue_timeout: float = 30.0):
+        self.tools = {t.name: t for t in tools}
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.queue_timeout = queue_timeout
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="tool")
+        return self._pool
+
+    def timeout_for(self, name: str) -> float:
+        return self.timeouts.get(name, self.default_timeout)
+
+    def queue_deadline(self, state: dict) -> float:
+        """Monotonic time by which a queued call must have started"""
+        limit = self.queue_timeout
+        if state.get("deadline"):
+            limit = min(limit, state["deadline"] - time.time())
+        return time.monotonic() + limit
+
+    def _run(self, call: dict, started: "_Started" = None) -> ToolMessage:
+        if started is not None and not started():
+            return _not_started(call, self.max_workers)
+        tool = self.tools.get(call["name"])
+        if tool is None:
+            return _error(call, f"Tool '{call['name']}' not found. Available tools: {list(self.tools)}")
+        try:
+            return ToolMessage(content=str(tool.invoke(call["args"])), name=call["name"], tool_call_id=call["id"])
+        except Exception as e:
+            return _error(call, f"Error: {e}")
+
+    def invoke(self, state: dict) -> dict:
+        """Sync node: submit all calls, then collect each one by its own deadline"""
+        calls = state["messages"][-1].tool_calls
+        queue_deadline = self.queue_deadline(state)
+        # Each call runs in a copy of this context so metrics can still see the graph config
+        jobs = []
+        for call in calls:
+            started = _Started(queue_deadline)
+            jobs.append((call, started, self.pool.submit(contextvars.copy_context().run, self._run, call, started)))
+        messages = []
+        for call, started, future in jobs:
+            if not started.event.wait(max(0.0, queue_deadline - time.monotonic())):
+                if future.cancel():
+                    messages.append(_not_started(call, self.max_workers))
+                    continue
+                started.event.wait()  # picked up just now
+            timeout = self.timeout_for(call["name"])
+            try:
+                messages.append(future.result(timeout=max(0.0, started.at + timeout - time.monotonic())))
+            except FutureTimeout:
+                messages.append(_timed_out(call, timeout))
+        return {"messages": messages}
+
+    async def ainvoke(self, state: dict) -> dict:
+        """Async node: native coroutines where a tool has one, the thread pool otherwise"""
+        calls = state["messages"][-1].tool_calls
+        loop = asyncio.get_running_loop()
+        queue_deadline = self.queue_deadline(state)
+
+        async def run(call):
+            tool = self.tools.get(call["name"])
+            timeout = self.timeout_for(call["name"])
+            try:
+                if tool is not None and getattr(tool, "coroutine", None) is not None:
+                    result = await asyncio.wait_for(tool.ainvoke(call["args"]), timeout)
+                    return ToolMessage(content=str(result), name=call["name"], tool_call_id=call["id"])
+                ctx = contextvars.copy_context()
+                started = _Started(queue_deadline, loop)
+                future = loop.run_in_executor(self.pool, ctx.run, self._run, call, started)
+                try:
+                    await asyncio.wait_for(started.wait(), max(0.0, queue_deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    if started.at is None:
+                        future.cancel()
+                        return _not_started(call, self.max_workers)
+                return await asyncio.wait_for(future, max(0.0, started.at + timeout - time.monotonic()))
+            except asyncio.TimeoutError:
+                return _timed_out(call, timeout)
+            except Exception as e:
+                return _error(call, f"Error: {e}")
+
+        return {"messages": list(await asyncio.gather(*(run(call) for call in calls)))}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+class _Started:
+    """Set by the pool thread when it picks a call up, with the monotonic time it did"""
+
+    def __init__(self, deadline: float, loop: asyncio.AbstractEventLoop = None):
+        self.deadline = deadline
+        self.at = None
+        self.event = threading.Event()
+        self._loop = loop
+        self._async_event = asyncio.Event() if loop is not None else None
+
+    def __call__(self) -> bool:
+        """Mark the call started; False when it waited past its queue deadline and should not run"""
+        self.at = time.monotonic()
+        self.event.set()
+        if self._loop is not None:
+            with contextlib.suppress(RuntimeError):  # the loop may have closed while the call was queued
+                self._loop.call_soon_threadsafe(self._async_event.set)
+        return self.at <= self.deadline
+
+    async def wait(self):
+        await self._async_event.wait()
+
+
+def _error(call: dict, text: str) -> ToolMessage:
+    return ToolMessage(content=f"❌ {text}", name=call["name"], tool_call_id=call["id"], status="error")
+
+
+def _timed_out(call: dict, timeout: float) -> ToolMessage:
+    return _error(call, f"Tool '{call['name']}' timed out after {timeout:g}s; answer without it.")
+
+
+def _not_started(call: dict, workers: int) -> ToolMessage:
+    return _error(call, f"Tool '{call['name']}' did not start: all {workers} tool workers were busy; answer without it.")
+
+
+def create_tool_node(tools: list, settings: dict = None):
+    """Graph node running tool calls concurrently, configured from config.TOOL_EXECUTION"""
+    from langchain_core.runnables import RunnableLambda
+
+    executor = ToolExecutor(tools, **{**TOOL_EXECUTION, **(settings or {})})
+    return RunnableLambda(executor.invoke, afunc=executor.ainvoke, name="tools")
@@ -1,131 +1,166 @@
+from functools import lru_cache
+
 from langchain_core.tools import tool
-from langgraph.types import interrupt
-from datetime import datetime
-import time
-from functools import wraps  # ✅ import wraps
 
+from metrics import track_tool
+from tool_cache import cached_tool
+from units import canonical, convert, format_value
+from recipe_index import normalize_ingredients, open_index
+from market_data import create_market_data
+from config import RECIPE_CORPUS
+
+
+# Mock backend data - in real implementation, you'd call a weather/news API.
+# Stock prices come from market_data's price table instead.
+# Built once at import and keyed case-insensitively, matching the cache keys below.
+WEATHER_DATA = {
+    "new york": "Sunny, 72°F, Humidity: 45%",
+    "london": "Cloudy, 15°C, Humidity: 70%",
+    "tokyo": "Rainy, 20°C, Humidity: 85%",
+    "paris": "Partly cloudy, 18°C, Humidity: 55%",
+    "sydney": "Clear, 25°C, Humidity: 40%"
+}
+
+NEWS_DATA = {
+    "technology": [
+        "AI Breakthrough: New Model Achieves Human-Level Reasoning",
+        "Quantum Computing Milestone Reached by Tech Giant",
+        "SpaceX Successfully Launches Latest Satellite Constellation"
+    ],
+    "business": [
+        "Stock Market Hits All-Time High Amid Economic Recovery",
+        "Cryptocurrency Market Shows Signs of Stabilization",
+        "Major Merger Announced Between Tech Companies"
+    ],
+    "sports": [
+        "Championship Game Ends in Dramatic Overtime Victory",
+        "Star Athlete Signs Record-Breaking Contract",
+        "Olympic Committee Announces Host City for 2032 Games"
+    ]
+}
+
+DEFAULT_HEADLINES = [
+    "Global Climate Summit Reaches Historic Agreement",
+    "Medical Breakthrough Offers Hope for Rare Disease",
+    "International Space Station Celebrates 25 Years"
+]
+
+def _ingredient_key(ingredients: str, cuisine: str):
+    return frozenset(normalize_ingredients(ingredients)), cuisine.strip().casefold()
+
+
+@lru_cache(maxsize=1)
+def _recipe_index():
+    return open_index(RECIPE_CORPUS)
 
-# ✅ Reuse the tracker with docstring preservation
-def track_node(node_name):
-    def decorator(func):
-        @wraps(func)  # ✅ this keeps the original name & docstring
-        def wrapper(*args, **kwargs):
-            print(f"🟢 [{datetime.now().strftime('%H:%M:%S')}] ENTER TOOL: {node_name}")
-            start_time = time.time()
 
-            result = func(*args, **kwargs)
+@lru_cache(maxsize=1)
+def _market_data():
+    return create_market_data()
 
-            elapsed = time.time() - start_time
-            print(f"✅ [{datetime.now().strftime('%H:%M:%S')}] EXIT TOOL: {node_name} ({elapsed:.2f}s)")
-            return result
-        return wrapper
-    return decorator
+
+def _format_quote(price: float, change_pct: float) -> str:
+    return f"${price:,.2f} ({change_pct:+.1f}%)"
+
+
+def _unknown_symbols(symbols) -> str:
+    return f"Stock data not available for {symbols}. Try {', '.join(_market_data().table.symbols[:5])}."
+
+
+def _holdings_key(symbols: list, quantities: list = None):
+    return tuple(s.strip().upper() for s in symbols), tuple(quantities) if quantities else None
 
 
 @tool
-@track_node("get_weather")
+@track_tool("get_weather")
+@cached_tool("get_weather", ttl=600, key=lambda location: location.strip().casefold())
 def get_weather(location: str) -> str:
     """Get current weather information for a location.
     :param location: City name or location
     :return: Weather information
     """
-    # Mock weather data - in real implementation, you'd call a weather API
-    weather_data = {
-        "New York": "Sunny, 72°F, Humidity: 45%",
-        "London": "Cloudy, 15°C, Humidity: 70%",
-        "Tokyo": "Rainy, 20°C, Humidity: 85%",
-        "Paris": "Partly cloudy, 18°C, Humidity: 55%",
-        "Sydney": "Clear, 25°C, Humidity: 40%"
-    }
-    return weather_data.get(location, f"Weather data not available for {location}. Try major cities like New York, London, Tokyo, Paris, or Sydney.")
+    return WEATHER_DATA.get(location.strip().casefold(), f"Weather data not available for {location}. Try major cities like New York, London, Tokyo, Paris, or Sydney.")
 
 
 @tool
-@track_node("get_stock_price")
+@track_tool("get_stock_price")
+@cached_tool("get_stock_price", ttl=15, key=lambda symbol: symbol.strip().upper())
 def get_stock_price(symbol: str) -> str:
     """Get current stock price for a given symbol.
     :param symbol: Stock ticker symbol (e.g., AAPL, MSFT, GOOGL)
     :return: Stock price information
     """
-    stock_data = {
-        "AAPL": "$175.50 (+2.3%)",
-        "MSFT": "$380.25 (+1.8%)",
-        "GOOGL": "$142.80 (+0.5%)",
-        "AMZN": "$155.30 (-0.7%)",
-        "TSLA": "$248.90 (+3.2%)"
-    }
-    return stock_data.get(symbol.upper(), f"Stock data not available for {symbol}. Try AAPL, MSFT, GOOGL, AMZN, or TSLA.")
+    quote = _market_data().table.quote(symbol)
+    return _format_quote(*quote) if quote else _unknown_symbols(symbol)
+
+
+@tool
+@track_tool("get_stock_prices")
+@cached_tool("get_stock_prices", ttl=15, key=_holdings_key)
+def get_stock_prices(symbols: list[str], quantities: list[float] = None) -> str:
+    """Get current prices for several stock symbols at once, with portfolio value and daily change.
+    :param symbols: Stock ticker symbols (e.g., ["AAPL", "MSFT", "NVDA"])
+    :param quantities: Optional number of shares held of each symbol, in the same order
+    :return: One price line per symbol and the combined value and change
+    """
+    if quantities and len(quantities) != len(symbols):
+        return f"❌ Got {len(quantities)} quantities for {len(symbols)} symbols"
+    table = _market_data().table
+    known, rows, unknown = table.lookup(symbols)
+    if not known:
+        return _unknown_symbols(", ".join(symbols))
+
+    lines = [f"📈 {symbol}: {_format_quote(table.price[row], table.change_pct[row])}" for symbol, row in zip(known, rows)]
+    if quantities:
+        holdings = {}
+        for symbol, quantity in zip(symbols, quantities):
+            symbol = symbol.strip().upper()
+            holdings[symbol] = holdings.get(symbol, 0.0) + float(quantity)
+        total = table.portfolio(rows, [holdings[s] for s in known])
+        label = "Portfolio value"
+    else:
+        total = table.portfolio(rows)
+        label = "One share of each"
+    lines.append(f"💼 {label}: ${total['value']:,.2f} ({total['change']:+,.2f}, {total['change_pct']:+.2f}% today)")
+    if unknown:
+        lines.append(f"⚠️ No data for {', '.join(unknown)}")
+    return "\n".join(lines)
 
 
 @tool
-@track_node("get_news_headlines")
+@track_tool("get_news_headlines")
+@cached_tool("get_news_headlines", ttl=300, key=lambda category: category.strip().casefold())
 def get_news_headlines(category: str = "general") -> str:
     """Get latest news headlines for a category.
     :param category: News category (technology, business, sports, entertainment, health)
     :return: News headlines
     """
-    news_data = {
-        "technology": [
-            "AI Breakthrough: New Model Achieves Human-Level Reasoning",
-            "Quantum Computing Milestone Reached by Tech Giant",
-            "SpaceX Successfully Launches Latest Satellite Constellation"
-        ],
-        "business": [
-            "Stock Market Hits All-Time High Amid Economic Recovery",
-            "Cryptocurrency Market Shows Signs of Stabilization",
-            "Major Merger Announced Between Tech Companies"
-        ],
-        "sports": [
-            "Championship Game Ends in Dramatic Overtime Victory",
-            "Star Athlete Signs Record-Breaking Contract",
-            "Olympic Committee Announces Host City for 2032 Games"
-        ]
-    }
-
-    headlines = news_data.get(category.lower(), [
-        "Global Climate Summit Reaches Historic Agreement",
-        "Medical Breakthrough Offers Hope for Rare Disease",
-        "International Space Station Celebrates 25 Years"
-    ])
+    headlines = NEWS_DATA.get(category.strip().lower(), DEFAULT_HEADLINES)
 
     return f"📰 Latest {category.title()} News:\n" + "\n".join(f"• {headline}" for headline in headlines)
 
 
 @tool
-@track_node("suggest_recipe")
+@track_tool("suggest_recipe")
+@cached_tool("suggest_recipe", ttl=6 * 3600, key=_ingredient_key)
 def suggest_recipe(ingredients: str, cuisine: str = "any") -> str:
     """Suggest a recipe based on available ingredients and cuisine preference.
     :param ingredients: Comma-separated list of available ingredients
     :param cuisine: Preferred cuisine type (italian, mexican, asian, american, etc.)
     :return: Recipe suggestion
     """
-    ingredient_list = [ing.strip().lower() for ing in ingredients.split(",")]
-
-    # Simple recipe matching logic
-    if "chicken" in ingredient_list and "rice" in ingredient_list:
-        return """
-🍗 Chicken Fried Rice Recipe:
-Ingredients: Chicken, rice, vegetables, soy sauce, eggs
-Instructions:
-1. Cook rice and set aside
-2. Stir-fry chicken until cooked
-3. Add vegetables and scrambled eggs
-4. Mix in rice and soy sauce
-5. Serve hot
-Time: 25 minutes | Serves: 4
-"""
-    elif "pasta" in ingredient_list and "tomato" in ingredient_list:
-        return """
-🍝 Simple Pasta Sauce Recipe:
-Ingredients: Pasta, tomatoes, garlic, olive oil, basil
+    matches = _recipe_index().search(ingredients, cuisine, k=3)
+    if matches:
+        _, matched, recipe = matches[0]
+        steps = "\n".join(f"{i}. {step}" for i, step in enumerate(recipe["steps"], 1))
+        alternatives = ", ".join(r["name"] for _, _, r in matches[1:])
+        return f"""
+🍳 {recipe['name']} ({recipe['cuisine'].title()}) - uses your {', '.join(matched)}
+Ingredients: {', '.join(recipe['ingredients'])}
 Instructions:
-1. Cook pasta according to package
-2. Sauté garlic in olive oil
-3. Add chopped tomatoes and simmer
-4. Season with basil and salt
-5. Toss with cooked pasta
-Time: 20 minutes | Serves: 2
-"""
+{steps}
+Time: {recipe['time_minutes']} minutes | Serves: {recipe['serves']}
+""" + (f"Also try: {alternatives}\n" if alternatives else "")
     else:
         return f"""
 🍳 Custom Recipe Suggestion:
@@ -148,7 +183,13 @@ Pro tip: Start with the longest-cooking ingredients first!
 
 
 @tool
-@track_node("convert_units")
+@track_tool("convert_units")
+@cached_tool(
+    "convert_units",
+    ttl=24 * 3600,
+    maxsize=1024,
+    key=lambda value, from_unit, to_unit: (float(value), canonical(from_unit), canonical(to_unit)),
+)
 def convert_units(value: float, from_unit: str, to_unit: str) -> str:
     """Convert between different units of measurement.
     :param value: Numeric value to convert
@@ -156,25 +197,28 @@ def convert_units(value: float, from_unit: str, to_unit: str) -> str:
     :param to_unit: Target unit
     :return: Converted value
     """
-    conversions = {
-        ("kg", "lbs"): lambda x: x * 2.20462,
-        ("lbs", "kg"): lambda x: x / 2.20462,
-        ("celsius", "fahrenheit"): lambda x: (x * 9/5) + 32,
-        ("fahrenheit", "celsius"): lambda x: (x - 32) * 5/9,
-        ("meters", "feet"): lambda x: x * 3.28084,
-        ("feet", "meters"): lambda x: x / 3.28084,
-        ("km", "miles"): lambda x: x * 0.621371,
-        ("miles", "km"): lambda x: x / 0.621371,
-        ("liters", "gallons"): lambda x: x * 0.264172,
-        ("gallons", "liters"): lambda x: x / 0.264172
-    }
-
-    key = (from_unit.lower(), to_unit.lower())
-    if key in conversions:
-        result = conversions[key](value)
-        return ".2f"
-    else:
-        return f"❌ Conversion from {from_unit} to {to_unit} not supported. Try: kg↔lbs, celsius↔fahrenheit, meters↔feet, km↔miles, liters↔gallons."
+    try:
+        result = convert(float(value), from_unit, to_unit)
+    except ValueError as e:
+        return f"❌ {e}"
+    return f"{format_value(float(value))} {canonical(from_unit)} = {format_value(result)} {canonical(to_unit)}"
+
+
+@tool
+@track_tool("convert_units_bulk")
+def convert_units_bulk(values: list[float], from_unit: str, to_unit: str) -> str:
+    """Convert many values between the same two units in one call.
+    :param values: Numeric values to convert
+    :param from_unit: Source unit (kg, lbs, celsius, fahrenheit, meters, feet, etc.)
+    :param to_unit: Target unit
+    :return: Converted values, in the same order
+    """
+    try:
+        results = convert([float(v) for v in values], from_unit, to_unit)
+    except ValueError as e:
+        return f"❌ {e}"
+    converted = ", ".join(format_value(r) for r in results)
+    return f"{len(results)} values from {canonical(from_unit)} to {canonical(to_unit)}: {converted}"
 
 
-tools = [get_weather, get_stock_price, get_news_headlines, suggest_recipe, convert_units]
\ No newline at end of file
+tools = [get_weather, get_stock_price, get_stock_prices, get_news_headlines, suggest_recipe, convert_units, convert_units_bulk]
\ No newline at end of file
@@ -0,0 +1,136 @@
+from collections import deque
+
+# Unit graph: each edge (a, b, scale, offset) means b = a * scale + offset.
+# Conversions between any two units of a dimension are composed from these
+# edges once at import, so km -> feet works without listing every pair.
+UNIT_GRAPH = {
+    "mass": [
+        ("kg", "g", 1000, 0),
+        ("lbs", "kg", 0.45359237, 0),
+        ("lbs", "oz", 16, 0),
+    ],
+    "length": [
+        ("km", "meters", 1000, 0),
+        ("meters", "cm", 100, 0),
+        ("cm", "mm", 10, 0),
+        ("inches", "cm", 2.54, 0),
+        ("feet", "inches", 12, 0),
+        ("miles", "feet", 5280, 0),
+    ],
+    "volume": [
+        ("liters", "ml", 1000, 0),
+        ("gallons", "liters", 3.785411784, 0),
+        ("cups", "ml", 236.5882365, 0),
+        ("tbsp", "ml", 14.78676478125, 0),
+        ("tsp", "ml", 4.92892159375, 0),
+    ],
+    "temperature": [
+        ("celsius", "kelvin", 1, 273.15),
+        ("fahrenheit", "celsius", 5 / 9, -160 / 9),
+    ],
+}
+
+UNIT_ALIASES = {
+    "kg": "kg", "kgs": "kg", "kilo": "kg", "kilos": "kg", "kilogram": "kg", "kilograms": "kg",
+    "g": "g", "gram": "g", "grams": "g",
+    "lb": "lbs", "lbs": "lbs", "pound": "lbs", "pounds": "lbs",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "c": "celsius", "celsius": "celsius", "°c": "celsius",
+    "f": "fahrenheit", "fahrenheit": "fahrenheit", "°f": "fahrenheit",
+    "k": "kelvin", "kelvin": "kelvin",
+    "m": "meters", "meter": "meters", "meters": "meters", "metre": "meters", "metres": "meters",
+    "cm": "cm", "centimeter": "cm", "centimeters": "cm", "centimetre": "cm", "centimetres": "cm",
+    "mm": "mm", "millimeter": "mm", "millimeters": "mm", "millimetre": "mm", "millimetres": "mm",
+    "in": "inches", "inch": "inches", "inches": "inches",
+    "ft": "feet", "foot": "feet", "feet": "feet",
+    "km": "km", "kms": "km", "kilometer": "km", "kilometers": "km", "kilometre": "km", "kilometres": "km",
+    "mi": "miles", "mile": "miles", "miles": "miles",
+    "l": "liters", "liter": "liters", "liters": "liters", "litre": "liters", "litres": "liters",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "gal": "gallons", "gallon": "gallons", "gallons": "gallons",
+    "cup": "cups", "cups": "cups",
+    "tbsp": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+}
+
+
+def _build(graph: dict):
+    """Walk each dimension from its first unit, then compose every (from, to) pair"""
+    dimensions = {}
+    table = {}
+    for dimension, edges in graph.items():
+        neighbours = {}
+        for a, b, scale, offset in edges:
+            neighbours.setdefault(a, []).append((b, scale, offset))
+            neighbours.setdefault(b, []).append((a, 1 / scale, -offset / scale))
+
+        # to_root[u] = (s, o): root = u * s + o
+        root = edges[0][0]
+        to_root = {root: (1.0, 0.0)}
+        queue = deque([root])
+        while queue:
+            unit = queue.popleft()
+            s, o = to_root[unit]
+            for other, scale, offset in neighbours[unit]:
+                if other not in to_root:
+                    # unit = other * (1/scale) - offset/scale, then into root
+                    to_root[other] = (s / scale, o - s * offset / scale)
+                    queue.append(other)
+
+        for unit in to_root:
+            dimensions[unit] = dimension
+        for a, (sa, oa) in to_root.items():
+            for b, (sb, ob) in to_root.items():
+                # b = (a * sa + oa - ob) / sb
+                table[(a, b)] = (sa / sb, (oa - ob) / sb)
+    return dimensions, table
+
+
+DIMENSIONS, FACTORS = _build(UNIT_GRAPH)
+
+
+def canonical(unit: str) -> str:
+    """Resolve an alias ("lb", "°C", "Kilometres") to its unit name"""
+    unit = unit.strip().lower()
+    return UNIT_ALIASES.get(unit, unit)
+
+
+def supported_units() -> str:
+    by_dimension = {}
+    for unit, dimension in DIMENSIONS.items():
+        by_dimension.setdefault(dimension, []).append(unit)
+    return "; ".join(f"{dimension}: {', '.join(units)}" for dimension, units in by_dimension.items())
+
+
+def factors(from_unit: str, to_unit: str) -> tuple:
+    """(scale, offset) such that result = value * scale + offset"""
+    src, dst = canonical(from_unit), canonical(to_unit)
+    pair = FACTORS.get((src, dst))
+    if pair is None:
+        for unit in (src, dst):
+            if unit not in DIMENSIONS:
+                raise ValueError(f"Unknown unit '{unit}'. Supported units - {supported_units()}")
+        raise ValueError(f"Cannot convert {DIMENSIONS[src]} ({src}) to {DIMENSIONS[dst]} ({dst})")
+    return pair
+
+
+def convert(values, from_unit: str, to_unit: str):
+    """Convert a number, a list of numbers or a NumPy array in one pass.
+
+    Arrays (anything with a dtype) are converted with a single vectorized
+    multiply-add, so NumPy is used when the caller already has it, without
+    this module importing it.
+    """
+    scale, offset = factors(from_unit, to_unit)
+    if isinstance(values, (int, float)):
+        return values * scale + offset
+    if hasattr(values, "dtype"):
+        return values * scale + offset
+    return [v * scale + offset for v in values]
+
+
+def format_value(value: float) -> str:
+    """Two decimals, or three significant digits for values that would round to 0.00"""
+    if value == 0 or abs(value) >= 0.01:
+        return f"{value:.2f}"
+    return f"{value:.3g}"